@@ -6,7 +6,13 @@ __version__ = "1.0.0"
 __author__ = "Your Name"
 __description__ = "Twitter MCP Server with OAuth support"
 
-# استيراد الدوال الرئيسية
-from .server import run
+import importlib
+
+# استيراد الخادم عند الطلب فقط: عمليات spawn الفرعية تستورد الحزمة ولا يجب أن تشغّل خادم المصادقة
+def __getattr__(name):
+    if name in ("run", "server"):
+        server = importlib.import_module(f"{__name__}.server")
+        return server.run if name == "run" else server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = ["run"]
\ No newline at end of file
@@ -7,6 +7,16 @@ from typing import List, Optional
 import uvicorn
 from .database import db_manager, TwitterAccount
 from .oauth_manager import oauth_manager
+from .http_pool import get_pool_stats
+from .retry import retry_budget
+from .circuit_breaker import circuit_breakers
+from .cache import user_cache, trends_cache
+from .batching import get_batch_stats
+from .singleflight import single_flight
+from .prefetch import page_prefetcher
+from .graph import follow_graph_cache
+from .media_cache import media_cache
+from .image_optimizer import image_optimizer
 import threading
 import time
 import os
@@ -961,6 +971,7 @@ async def update_account(username: str, update_data: AccountUpdate):
         with db_manager.get_session() as session:
             session.merge(current_account)
             session.commit()
+        db_manager.notify_account_changed(username)
         
         # إعادة الحصول على الحساب المُحدث
         updated_account = db_manager.get_account(username)
@@ -1045,7 +1056,18 @@ async def get_server_info():
             "deactivate_account": "PATCH /accounts/{username}/deactivate",
             "test_credentials": "GET /accounts/{username}/test",
             "api_docs": "GET /docs"
-        }
+        },
+        "http_pool": get_pool_stats(),
+        "retries": retry_budget.to_dict(),
+        "circuit_breakers": circuit_breakers.snapshot(),
+        "user_cache": user_cache.stats(),
+        "batching": get_batch_stats(),
+        "single_flight": single_flight.stats(),
+        "trends_cache": trends_cache.stats(),
+        "prefetch": page_prefetcher.stats(),
+        "follow_graph_cache": follow_graph_cache.stats(),
+        "media_cache": media_cache.stats(),
+        "image_optimizer": image_optimizer.stats()
     }
 
 # نقطة نهاية خاصة بـ n8n
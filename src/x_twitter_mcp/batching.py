@@ -0,0 +1,94 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+from .config import config
+
+# الحد الأقصى لعدد المعرّفات في طلب get_users/get_tweets
+MAX_BATCH_SIZE = 100
+
+class BatchLoader:
+    """تجميع طلبات المعرّف الواحد المتزامنة في طلب دفعي واحد (على نمط DataLoader)"""
+
+    def __init__(self, batch_fn: Callable[[str, List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+                 window: float, max_size: int = MAX_BATCH_SIZE, split_errors: Tuple[type, ...] = ()):
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_size = min(max_size, MAX_BATCH_SIZE)
+        # أخطاء ترفض الدفعة كاملة بسبب معرّف واحد؛ عندها يُعاد كل معرّف وحده
+        self.split_errors = split_errors
+        self._pending: Dict[str, Dict[Hashable, List[asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self.loads = 0
+        self.batches = 0
+        self.splits = 0
+
+    async def load(self, account: str, key: Hashable):
+        """انتظار نتيجة معرّف واحد؛ تعيد None إذا لم تُعده X"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(account, {})
+        pending.setdefault(key, []).append(future)
+        self.loads += 1
+
+        if len(pending) >= self.max_size:
+            self._flush(account)
+        elif account not in self._timers:
+            self._timers[account] = loop.call_later(self.window, self._flush, account)
+        return await future
+
+    def _flush(self, account: str):
+        """إرسال المعرّفات المجمعة للحساب"""
+        handle = self._timers.pop(account, None)
+        if handle is not None:
+            handle.cancel()
+        pending = self._pending.pop(account, None)
+        if pending:
+            self.batches += 1
+            asyncio.ensure_future(self._dispatch(account, pending))
+
+    async def _dispatch(self, account: str, pending: Dict[Hashable, List[asyncio.Future]]):
+        """تنفيذ الطلب الدفعي وتوزيع النتائج على المنتظرين"""
+        try:
+            results = await self.batch_fn(account, list(pending))
+        except Exception as e:
+            if len(pending) > 1 and isinstance(e, self.split_errors):
+                # خطأ مستدعٍ واحد لا يُفشل طلبات الآخرين: تقسيم الدفعة نصفين حتى يُعزل المعرّف السيئ
+                self.splits += 1
+                items = list(pending.items())
+                middle = len(items) // 2
+                await asyncio.gather(
+                    self._dispatch(account, dict(items[:middle])),
+                    self._dispatch(account, dict(items[middle:]))
+                )
+                return
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(key))
+
+    def stats(self) -> Dict:
+        """عدد الطلبات الفردية والطلبات الدفعية المرسلة فعلاً"""
+        return {"loads": self.loads, "batches": self.batches, "splits": self.splits}
+
+# المجمّعات المسجلة بالاسم لعرض إحصاءاتها
+batch_loaders: Dict[str, BatchLoader] = {}
+
+def create_batch_loader(name: str, batch_fn: Callable[[str, List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+                        split_errors: Tuple[type, ...] = ()) -> BatchLoader:
+    """إنشاء مجمّع بإعدادات BATCH_* وتسجيله"""
+    loader = BatchLoader(
+        batch_fn,
+        window=config.BATCH_WINDOW_MS / 1000,
+        max_size=config.BATCH_MAX_SIZE,
+        split_errors=split_errors
+    )
+    batch_loaders[name] = loader
+    return loader
+
+def get_batch_stats() -> Dict:
+    """إحصاءات جميع المجمّعات"""
+    return {name: loader.stats() for name, loader in batch_loaders.items()}
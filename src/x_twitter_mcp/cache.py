@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(value: Any) -> int:
+    """تقدير حجم القيمة بالبايت عبر تمثيلها بـ JSON"""
+    data = getattr(value, "data", value)
+    try:
+        return len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return len(repr(data))
+
+class TTLCache:
+    """ذاكرة مؤقتة بمدة صلاحية وإخلاء LRU حسب عدد العناصر والحجم بالبايت"""
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key: Hashable, evicted: bool = True):
+        value, _, size = self._entries.pop(key)
+        self._bytes -= size
+        if evicted:
+            self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def get(self, key: Hashable) -> Any:
+        """الحصول على قيمة صالحة أو None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: Optional[int] = None):
+        """حفظ قيمة وإخلاء الأقدم استخداماً عند تجاوز الحدود"""
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, evicted=False)
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, evicted=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """عدادات الإصابة والإخفاق والحجم"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+class UserCache:
+    """ذاكرة مؤقتة لملفات المستخدمين بالمعرّف واسم المستخدم (بأحرف صغيرة)"""
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int, scope_protected: bool = True):
+        self.scope_protected = scope_protected
+        self._users = TTLCache(ttl, max_entries, max_bytes, on_evict=self._on_evict)
+        self._screen_names: Dict[tuple, tuple] = {}
+
+    @staticmethod
+    def _scope(user, account: str) -> Optional[str]:
+        """الحسابات المحمية تُحفظ لكل حساب على حدة"""
+        return account if getattr(user, "protected", False) else None
+
+    def _on_evict(self, key: tuple, user):
+        alias = (key[0], str(user.username).lower())
+        if self._screen_names.get(alias) == key:
+            del self._screen_names[alias]
+
+    def put(self, user, account: str):
+        """حفظ ملف مستخدم"""
+        if user is None:
+            return
+        scope = self._scope(user, account) if self.scope_protected else None
+        self._users.set((scope, str(user.id)), user)
+        self._screen_names[(scope, str(user.username).lower())] = (scope, str(user.id))
+
+    def get_by_id(self, user_id: str, account: str):
+        """البحث بالمعرّف في النطاق العام ثم نطاق الحساب"""
+        user = self._users.get((None, str(user_id)))
+        if user is None and self.scope_protected:
+            user = self._users.get((account, str(user_id)))
+        return user
+
+    def get_by_screen_name(self, screen_name: str, account: str):
+        """البحث باسم المستخدم في النطاق العام ثم نطاق الحساب"""
+        screen_name = screen_name.lstrip("@").lower()
+        for scope in (None, account) if self.scope_protected else (None,):
+            key = self._screen_names.get((scope, screen_name))
+            if key is not None:
+                user = self._users.get(key)
+                if user is not None:
+                    return user
+        return None
+
+    def stats(self) -> Dict:
+        return self._users.stats()
+
+class StaleWhileRevalidateCache:
+    """ذاكرة تعيد القيمة القديمة فوراً بينما يجري تحديث واحد في الخلفية"""
+
+    def __init__(self, ttl: float, max_stale: float):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: Dict[Hashable, tuple] = {}
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable]) -> asyncio.Task:
+        """بدء تحديث واحد للمفتاح أو مشاركة التحديث الجاري"""
+        task = self._refreshing.get(key)
+        if task is None:
+            async def run():
+                try:
+                    value = await fetch()
+                    self._entries[key] = (value, time.monotonic())
+                    return value
+                finally:
+                    self._refreshing.pop(key, None)
+
+            self.refreshes += 1
+            task = asyncio.ensure_future(run())
+            self._refreshing[key] = task
+        return task
+
+    def _log_failure(self, key: Hashable, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background refresh failed for {key!r}: {task.exception()}")
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable]):
+        """القيمة الحديثة، أو القديمة مع تحديث في الخلفية، أو انتظار الجلب إن لم تتوفر"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refresh(key, fetch).add_done_callback(lambda task: self._log_failure(key, task))
+                return value
+        self.misses += 1
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes
+        }
+
+# إنشاء ذاكرة المستخدمين العامة
+user_cache = UserCache(
+    ttl=config.USER_CACHE_TTL_SECONDS,
+    max_entries=config.USER_CACHE_MAX_ENTRIES,
+    max_bytes=config.USER_CACHE_MAX_BYTES,
+    scope_protected=config.USER_CACHE_SCOPE_PROTECTED
+)
+
+# ذاكرة المواضيع الرائجة لكل WOEID
+trends_cache = StaleWhileRevalidateCache(
+    ttl=config.TRENDS_CACHE_TTL_SECONDS,
+    max_stale=config.TRENDS_CACHE_MAX_STALE_SECONDS
+)
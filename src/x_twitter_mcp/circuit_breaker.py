@@ -0,0 +1,169 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict
+import tweepy
+from .config import config
+from .retry import TRANSIENT_ERRORS, unwrap_error
+
+logger = logging.getLogger(__name__)
+
+# مجموعات نقاط النهاية التي لكل منها قاطع دائرة مستقل
+V2_USER_METHODS = {"get_me", "get_user", "get_users", "get_users_followers", "get_users_following"}
+
+def endpoint_family(method: str, api: str = "v2") -> str:
+    """تحديد مجموعة نقطة النهاية لطريقة tweepy"""
+    if api == "v1":
+        if "media" in method or method.startswith("chunked_upload"):
+            return "v1_media"
+        if "trends" in method:
+            return "v1_trends"
+        return "v1_other"
+    return "v2_users" if method in V2_USER_METHODS else "v2_tweets"
+
+class CircuitOpenError(Exception):
+    """القاطع مفتوح؛ يُرفض الطلب فوراً دون انتظار X"""
+
+    def __init__(self, family: str, retry_in: float):
+        self.family = family
+        self.retry_in = retry_in
+        super().__init__(f"Circuit breaker for '{family}' is open; retry in {int(retry_in)}s")
+
+class CircuitBreaker:
+    """قاطع دائرة يفتح عند تجاوز نسبة الأخطاء أو البطء ضمن نافذة متحركة"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, family: str, error_rate: float, min_calls: int, window_seconds: float,
+                 slow_call_seconds: float, open_seconds: float, half_open_probes: int):
+        self.family = family
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._outcomes: deque = deque()
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now: float):
+        self.state = self.OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self.times_opened += 1
+        logger.warning(f"Circuit breaker '{self.family}' opened")
+
+    def before_call(self):
+        """السماح بالطلب أو رفضه فوراً
+
+        Raises:
+            CircuitOpenError: إذا كان القاطع مفتوحاً أو كانت محاولات الاختبار مشغولة
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                retry_in = self._opened_at + self.open_seconds - now
+                if retry_in > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.family, retry_in)
+                self.state = self.HALF_OPEN
+                logger.info(f"Circuit breaker '{self.family}' half-open")
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.family, 0)
+                self._probes_in_flight += 1
+
+    def record(self, success: bool, duration: float):
+        """تسجيل نتيجة طلب سُمح به"""
+        failed = not success or duration >= self.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if failed:
+                    self._open(now)
+                elif self._probes_in_flight == 0:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"Circuit breaker '{self.family}' closed")
+                return
+            if self.state != self.CLOSED:
+                return
+
+            self._outcomes.append((now, failed))
+            self._trim(now)
+            if len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for _, outcome in self._outcomes if outcome)
+                if failures / len(self._outcomes) >= self.error_rate:
+                    self._open(now)
+
+    def release(self):
+        """تحرير طلب سُمح به ولم يصل إلى X (مثل رفض حد الطلبات محلياً)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            failures = sum(1 for _, outcome in self._outcomes if outcome)
+            return {
+                "state": self.state,
+                "calls_in_window": len(self._outcomes),
+                "failures_in_window": failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_in": max(self._opened_at + self.open_seconds - now, 0) if self.state == self.OPEN else 0
+            }
+
+def is_upstream_failure(exc: Exception) -> bool:
+    """هل يدل الخطأ على تعطل X (وليس خطأ في الطلب نفسه)"""
+    return isinstance(unwrap_error(exc), (tweepy.TwitterServerError,) + TRANSIENT_ERRORS)
+
+class CircuitBreakerRegistry:
+    """قواطع الدائرة لكل مجموعة نقاط نهاية"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, family: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(family)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    family,
+                    error_rate=config.CIRCUIT_BREAKER_ERROR_RATE,
+                    min_calls=config.CIRCUIT_BREAKER_MIN_CALLS,
+                    window_seconds=config.CIRCUIT_BREAKER_WINDOW_SECONDS,
+                    slow_call_seconds=config.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+                    open_seconds=config.CIRCUIT_BREAKER_OPEN_SECONDS,
+                    half_open_probes=config.CIRCUIT_BREAKER_HALF_OPEN_PROBES
+                )
+                self._breakers[family] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict:
+        """حالة جميع القواطع"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {family: breaker.to_dict() for family, breaker in breakers.items()}
+
+# إنشاء سجل قواطع الدائرة العام
+circuit_breakers = CircuitBreakerRegistry()
+for _family in ("v2_tweets", "v2_users", "v1_media", "v1_trends"):
+    circuit_breakers.get(_family)
@@ -0,0 +1,126 @@
+import threading
+import logging
+from typing import Dict, Tuple
+import tweepy
+from .database import db_manager, TwitterAccount
+from .http_pool import shared_session, create_aiohttp_session
+
+logger = logging.getLogger(__name__)
+
+class TwitterClientPool:
+    """سجل عملاء Twitter طويلي العمر لكل حساب"""
+
+    def __init__(self):
+        self._clients: Dict[str, Tuple[tuple, tweepy.Client, tweepy.API]] = {}
+        self._async_clients: Dict[str, tuple] = {}
+        self._aiohttp_session = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(account: TwitterAccount) -> tuple:
+        """بصمة مفاتيح المصادقة لاكتشاف تغيّرها"""
+        return (
+            account.api_key,
+            account.api_secret,
+            account.access_token,
+            account.access_token_secret,
+            account.bearer_token
+        )
+
+    def _build_clients(self, account: TwitterAccount) -> Tuple[tweepy.Client, tweepy.API]:
+        """إنشاء عملاء v2 و v1.1 لحساب"""
+        # Initialize v2 API client
+        twitter_client = tweepy.Client(
+            consumer_key=account.api_key,
+            consumer_secret=account.api_secret,
+            access_token=account.access_token,
+            access_token_secret=account.access_token_secret,
+            bearer_token=account.bearer_token
+        )
+
+        # Initialize v1.1 API for media uploads and other unsupported v2 endpoints
+        auth = tweepy.OAuth1UserHandler(
+            consumer_key=account.api_key,
+            consumer_secret=account.api_secret,
+            access_token=account.access_token,
+            access_token_secret=account.access_token_secret
+        )
+        twitter_v1_api = tweepy.API(auth)
+
+        # مشاركة مجموعة الاتصالات بين جميع الحسابات
+        twitter_client.session = shared_session
+        twitter_v1_api.session = shared_session
+
+        return twitter_client, twitter_v1_api
+
+    def get_clients(self, account: TwitterAccount) -> Tuple[tweepy.Client, tweepy.API]:
+        """الحصول على عملاء الحساب، وإعادة إنشائهم فقط إذا تغيّرت المفاتيح"""
+        fingerprint = self._fingerprint(account)
+        with self._lock:
+            entry = self._clients.get(account.username)
+            if entry and entry[0] == fingerprint:
+                return entry[1], entry[2]
+
+            client, v1_api = self._build_clients(account)
+            self._clients[account.username] = (fingerprint, client, v1_api)
+            logger.info(f"Created pooled Twitter clients for '{account.username}'")
+            return client, v1_api
+
+    def _get_aiohttp_session(self):
+        """جلسة aiohttp مشتركة بين جميع عملاء AsyncClient (تُنشأ داخل حلقة الأحداث)"""
+        if self._aiohttp_session is None or self._aiohttp_session.closed:
+            self._aiohttp_session = create_aiohttp_session()
+        return self._aiohttp_session
+
+    def get_async_client(self, account: TwitterAccount):
+        """الحصول على AsyncClient للحساب يستخدم الجلسة المشتركة"""
+        # يتطلب تثبيت tweepy[async]
+        from tweepy.asynchronous import AsyncClient
+
+        fingerprint = self._fingerprint(account)
+        session = self._get_aiohttp_session()
+        with self._lock:
+            entry = self._async_clients.get(account.username)
+            if entry and entry[0] == fingerprint:
+                entry[1].session = session
+                return entry[1]
+
+            async_client = AsyncClient(
+                consumer_key=account.api_key,
+                consumer_secret=account.api_secret,
+                access_token=account.access_token,
+                access_token_secret=account.access_token_secret,
+                bearer_token=account.bearer_token
+            )
+            async_client.session = session
+            self._async_clients[account.username] = (fingerprint, async_client)
+            logger.info(f"Created pooled async Twitter client for '{account.username}'")
+            return async_client
+
+    def invalidate(self, username: str):
+        """حذف عملاء حساب من السجل"""
+        with self._lock:
+            dropped = self._clients.pop(username, None)
+            dropped = self._async_clients.pop(username, None) or dropped
+            if dropped:
+                logger.info(f"Dropped pooled Twitter clients for '{username}'")
+
+    def clear(self):
+        """حذف جميع العملاء"""
+        with self._lock:
+            self._clients.clear()
+            self._async_clients.clear()
+
+    async def close(self):
+        """إغلاق جلسة aiohttp المشتركة"""
+        if self._aiohttp_session is not None and not self._aiohttp_session.closed:
+            await self._aiohttp_session.close()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+# إنشاء سجل العملاء العام
+client_pool = TwitterClientPool()
+
+# حذف العملاء عند تغيّر بيانات الحساب
+db_manager.add_account_listener(client_pool.invalidate)
@@ -23,6 +23,125 @@ class Config:
     # إعدادات OAuth
     OAUTH_STATE_EXPIRE_SECONDS = int(os.getenv("OAUTH_STATE_EXPIRE_SECONDS", "3600"))  # ساعة واحدة
     
+    # إعدادات التحقق من مفاتيح المصادقة
+    CREDENTIALS_CACHE_TTL_SECONDS = int(os.getenv("CREDENTIALS_CACHE_TTL_SECONDS", "900"))
+    CREDENTIALS_NEGATIVE_TTL_SECONDS = int(os.getenv("CREDENTIALS_NEGATIVE_TTL_SECONDS", "60"))
+    
+    # إعدادات تنفيذ طلبات Twitter
+    TWITTER_MAX_WORKERS = int(os.getenv("TWITTER_MAX_WORKERS", "32"))
+    TWITTER_MAX_CONCURRENCY = int(os.getenv("TWITTER_MAX_CONCURRENCY", "32"))
+    TWITTER_MAX_CONCURRENCY_PER_ACCOUNT = int(os.getenv("TWITTER_MAX_CONCURRENCY_PER_ACCOUNT", "4"))
+    # "threads" لتشغيل tweepy.Client في مجموعة خيوط، "asyncio" لاستخدام AsyncClient لطلبات v2
+    TWITTER_BACKEND = os.getenv("TWITTER_BACKEND", "threads").lower()
+    
+    # إعدادات مجموعة اتصالات HTTP المشتركة
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+    HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"
+    HTTP_KEEPALIVE_SECONDS = int(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    
+    # إعدادات حدود الطلبات: "reject" للرفض الفوري، "wait" للانتظار حتى إعادة تعيين الحد
+    RATE_LIMIT_MODE = os.getenv("RATE_LIMIT_MODE", "reject").lower()
+    RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "60"))
+    # مخزن حالة الحدود المشترك بين العمليات: sqlite أو redis أو memory
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "sqlite").lower()
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    
+    # إعدادات إعادة المحاولة للطلبات الفاشلة مؤقتاً
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+    RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5"))
+    RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "30"))
+    # كل طلب يضيف RETRY_BUDGET_RATIO من محاولة إلى الميزانية، بحد أقصى RETRY_BUDGET_MAX_TOKENS
+    RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+    RETRY_BUDGET_MAX_TOKENS = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", "10"))
+    
+    # إعدادات قواطع الدائرة لكل مجموعة نقاط نهاية
+    CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+    CIRCUIT_BREAKER_ERROR_RATE = float(os.getenv("CIRCUIT_BREAKER_ERROR_RATE", "0.5"))
+    CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "10"))
+    CIRCUIT_BREAKER_WINDOW_SECONDS = float(os.getenv("CIRCUIT_BREAKER_WINDOW_SECONDS", "60"))
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_SECONDS", "10"))
+    CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30"))
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_PROBES", "1"))
+    
+    # إعدادات ذاكرة ملفات المستخدمين
+    USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "900"))
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+    USER_CACHE_MAX_BYTES = int(os.getenv("USER_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    # الحسابات المحمية تُحفظ لكل حساب على حدة
+    USER_CACHE_SCOPE_PROTECTED = os.getenv("USER_CACHE_SCOPE_PROTECTED", "true").lower() == "true"
+    
+    # إعدادات تجميع طلبات المعرّف الواحد في get_users/get_tweets
+    BATCH_ENABLED = os.getenv("BATCH_ENABLED", "true").lower() == "true"
+    BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "10"))
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "100"))
+    
+    # دمج طلبات القراءة المتطابقة الجارية في طلب واحد
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    
+    # إعدادات ذاكرة المواضيع الرائجة (لكل WOEID)
+    TRENDS_CACHE_ENABLED = os.getenv("TRENDS_CACHE_ENABLED", "true").lower() == "true"
+    TRENDS_CACHE_TTL_SECONDS = float(os.getenv("TRENDS_CACHE_TTL_SECONDS", "300"))
+    # المدة الإضافية التي تُعاد فيها القيمة القديمة أثناء تحديثها في الخلفية
+    TRENDS_CACHE_MAX_STALE_SECONDS = float(os.getenv("TRENDS_CACHE_MAX_STALE_SECONDS", "3600"))
+    
+    # عدد التغريدات المحفوظة في الذاكرة لكل خلاصة في وضع المزامنة التزايدية
+    FEED_BUFFER_SIZE = int(os.getenv("FEED_BUFFER_SIZE", "500"))
+    
+    # إعدادات مخزن التغريدات المرئية لكل حساب
+    SEEN_TWEETS_MAX_AGE_SECONDS = float(os.getenv("SEEN_TWEETS_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+    SEEN_TWEETS_MAX_ENTRIES = int(os.getenv("SEEN_TWEETS_MAX_ENTRIES", "100000"))
+    # أقصى عدد صفحات يُطلب لجمع count تغريدة غير مرئية
+    SEEN_TWEETS_MAX_PAGES = int(os.getenv("SEEN_TWEETS_MAX_PAGES", "5"))
+    # مدة تجميع التغييرات قبل حفظها في قاعدة البيانات
+    SEEN_TWEETS_FLUSH_SECONDS = float(os.getenv("SEEN_TWEETS_FLUSH_SECONDS", "5"))
+    
+    # إعدادات الترقيم التلقائي (max_items)
+    PAGINATION_MAX_ITEMS = int(os.getenv("PAGINATION_MAX_ITEMS", "10000"))
+    PAGINATION_DEADLINE_SECONDS = float(os.getenv("PAGINATION_DEADLINE_SECONDS", "120"))
+    
+    # إعدادات الجلب المسبق للصفحة التالية
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+    PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "60"))
+    PREFETCH_MAX_ENTRIES = int(os.getenv("PREFETCH_MAX_ENTRIES", "256"))
+    # أقل نسبة متبقية من حد نقطة النهاية تسمح بالجلب المسبق
+    PREFETCH_MIN_HEADROOM = float(os.getenv("PREFETCH_MIN_HEADROOM", "0.5"))
+    
+    # إعدادات زاحف المتابعين والمتابَعين
+    CRAWLER_OUTPUT_DIR = os.getenv("CRAWLER_OUTPUT_DIR", "./crawls")
+    CRAWLER_PARQUET_ROWS_PER_PART = int(os.getenv("CRAWLER_PARQUET_ROWS_PER_PART", "50000"))
+    # مدة الانتظار في طابور الحدود قبل أن تنتقل المهمة إلى حالة waiting حتى إعادة التعيين
+    CRAWLER_MAX_WAIT_SECONDS = float(os.getenv("CRAWLER_MAX_WAIT_SECONDS", "60"))
+    
+    # إعدادات ذاكرة معرّفات المتابعين/المتابَعين (followers you know)
+    GRAPH_CACHE_TTL_SECONDS = float(os.getenv("GRAPH_CACHE_TTL_SECONDS", "3600"))
+    GRAPH_CACHE_MAX_BYTES = int(os.getenv("GRAPH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    GRAPH_MAX_IDS = int(os.getenv("GRAPH_MAX_IDS", "500000"))
+    
+    # مهلة رفع كل ملف وسائط
+    MEDIA_UPLOAD_TIMEOUT_SECONDS = float(os.getenv("MEDIA_UPLOAD_TIMEOUT_SECONDS", "120"))
+    
+    # إعدادات الرفع المجزأ (فيديو وGIF والملفات الكبيرة)
+    MEDIA_CHUNKED_THRESHOLD_BYTES = int(os.getenv("MEDIA_CHUNKED_THRESHOLD_BYTES", str(5 * 1024 * 1024)))
+    MEDIA_SEGMENT_SIZE_BYTES = int(os.getenv("MEDIA_SEGMENT_SIZE_BYTES", str(2 * 1024 * 1024)))
+    MEDIA_PARALLEL_SEGMENTS = int(os.getenv("MEDIA_PARALLEL_SEGMENTS", "3"))
+    MEDIA_PROCESSING_TIMEOUT_SECONDS = float(os.getenv("MEDIA_PROCESSING_TIMEOUT_SECONDS", "600"))
+    
+    # إعادة استخدام الوسائط المرفوعة حسب بصمة المحتوى (تنتهي في X بعد 24 ساعة)
+    MEDIA_CACHE_ENABLED = os.getenv("MEDIA_CACHE_ENABLED", "true").lower() == "true"
+    MEDIA_CACHE_TTL_SECONDS = float(os.getenv("MEDIA_CACHE_TTL_SECONDS", str(23 * 3600)))
+    
+    # تحسين الصور قبل الرفع (يتطلب Pillow)
+    IMAGE_OPTIMIZE_ENABLED = os.getenv("IMAGE_OPTIMIZE_ENABLED", "false").lower() == "true"
+    IMAGE_OPTIMIZER_WORKERS = int(os.getenv("IMAGE_OPTIMIZER_WORKERS", "2"))
+    IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "4096"))
+    IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(5 * 1024 * 1024)))
+    IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+    # الصور الأصغر من هذا الحجم تُرفع كما هي
+    IMAGE_OPTIMIZE_MIN_BYTES = int(os.getenv("IMAGE_OPTIMIZE_MIN_BYTES", str(512 * 1024)))
+    
     @classmethod
     def validate_oauth_config(cls) -> bool:
         """التحقق من صحة إعدادات OAuth"""
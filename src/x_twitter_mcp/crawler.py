@@ -0,0 +1,251 @@
+import asyncio
+import glob
+import importlib.util
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+import tweepy
+from .config import config
+from .database import db_manager
+from .executor import PRIORITY_BULK
+from .rate_limiter import RateLimitExceeded
+from .rate_limit_store import DEFAULT_WINDOW_SECONDS
+from .retry import get_retry_after
+
+logger = logging.getLogger(__name__)
+
+CRAWL_METHODS = {
+    "followers": "get_users_followers",
+    "following": "get_users_following"
+}
+CRAWL_FORMATS = ("ndjson", "parquet")
+CRAWL_USER_FIELDS = ["id", "name", "username", "created_at", "description", "protected", "public_metrics", "verified"]
+
+# أكبر صفحة يسمح بها X لقوائم المتابعين
+CRAWL_PAGE_SIZE = 1000
+
+class NDJSONWriter:
+    """كتابة السجلات سطراً سطراً؛ كل صفحة نقطة استئناف"""
+
+    def __init__(self, path: str, offset: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "r+b" if os.path.exists(path) else "wb")
+        # حذف ما كُتب بعد آخر نقطة استئناف محفوظة
+        self._file.truncate(offset)
+        self._file.seek(offset)
+
+    def write_page(self, records: List[Dict]) -> Optional[int]:
+        """كتابة صفحة وإعادة موضع الاستئناف بعدها"""
+        self._file.write(b"".join(json.dumps(record, default=str).encode() + b"\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> Optional[int]:
+        offset = self._file.tell()
+        self._file.close()
+        return offset
+
+    def abort(self):
+        """إغلاق دون حفظ؛ ما بعد نقطة الاستئناف يُحذف عند الاستئناف"""
+        if not self._file.closed:
+            self._file.close()
+
+class ParquetWriter:
+    """كتابة السجلات كملفات Parquet مرقمة؛ كل ملف مكتمل نقطة استئناف"""
+
+    def __init__(self, path: str, parts_written: int):
+        # اعتمادية اختيارية: pip install pyarrow
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.parts = parts_written
+        self._rows: List[Dict] = []
+        os.makedirs(path, exist_ok=True)
+        # حذف الملفات غير المكتملة أو التي كُتبت بعد آخر نقطة استئناف
+        for part in glob.glob(os.path.join(path, "part-*.parquet*")):
+            name = os.path.basename(part)
+            if name.endswith(".tmp") or int(name[5:10]) >= parts_written:
+                os.remove(part)
+
+    def _flush(self) -> int:
+        table = self._pa.Table.from_pylist(self._rows)
+        target = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        self._pq.write_table(table, target + ".tmp")
+        os.replace(target + ".tmp", target)
+        self._rows = []
+        self.parts += 1
+        return self.parts
+
+    def write_page(self, records: List[Dict]) -> Optional[int]:
+        """إضافة صفحة؛ تعيد عدد الملفات عند اكتمال ملف جديد وإلا None"""
+        self._rows.extend(records)
+        if len(self._rows) >= config.CRAWLER_PARQUET_ROWS_PER_PART:
+            return self._flush()
+        return None
+
+    def close(self) -> Optional[int]:
+        return self._flush() if self._rows else self.parts
+
+    def abort(self):
+        """تجاهل السجلات التي لم تُكتب بعد؛ ستُجلب مجدداً عند الاستئناف"""
+        self._rows = []
+
+class GraphCrawler:
+    """زاحف قابل للاستئناف لقوائم المتابعين والمتابَعين يكتب إلى NDJSON أو Parquet"""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._progress: Dict[str, int] = {}
+
+    async def create_job(self, username: str, target_user_id: str, direction: str, output_format: str) -> Dict:
+        """إنشاء مهمة زحف جديدة"""
+        if direction not in CRAWL_METHODS:
+            raise ValueError(f"direction must be one of {', '.join(CRAWL_METHODS)}")
+        if output_format not in CRAWL_FORMATS:
+            raise ValueError(f"output_format must be one of {', '.join(CRAWL_FORMATS)}")
+        if output_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            raise ValueError("Parquet output requires pyarrow (pip install x-twitter-mcp[parquet])")
+
+        job_id = uuid.uuid4().hex[:12]
+        name = f"{direction}-{target_user_id}-{job_id}"
+        output_path = os.path.abspath(os.path.join(
+            config.CRAWLER_OUTPUT_DIR, f"{name}.ndjson" if output_format == "ndjson" else name
+        ))
+        job = await asyncio.to_thread(
+            db_manager.create_crawl_job,
+            job_id=job_id,
+            username=username,
+            target_user_id=str(target_user_id),
+            direction=direction,
+            output_format=output_format,
+            output_path=output_path
+        )
+        if job is None:
+            raise RuntimeError("Failed to create crawl job")
+        return job
+
+    async def start(self, job_id: str, fetch: Callable[..., Awaitable]) -> Dict:
+        """تشغيل مهمة أو استئنافها من آخر نقطة محفوظة"""
+        job = await asyncio.to_thread(db_manager.get_crawl_job, job_id)
+        if job is None:
+            raise ValueError(f"Crawl job '{job_id}' not found")
+        if job["status"] == "completed":
+            return await self.status(job_id)
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            self._tasks[job_id] = asyncio.ensure_future(self._run(job, fetch))
+        return await self.status(job_id)
+
+    async def cancel(self, job_id: str) -> Dict:
+        """إيقاف مهمة؛ يمكن استئنافها لاحقاً"""
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+            # انتظار حفظ حالة الإلغاء قبل إعادة الحالة
+            await asyncio.gather(task, return_exceptions=True)
+        elif ((await asyncio.to_thread(db_manager.get_crawl_job, job_id)) or {}).get("status") != "completed":
+            await self._update(job_id, status="cancelled", waiting_until=None)
+        return await self.status(job_id)
+
+    async def status(self, job_id: str) -> Optional[Dict]:
+        """حالة المهمة مع التقدم غير المحفوظ بعد"""
+        job = await asyncio.to_thread(db_manager.get_crawl_job, job_id)
+        if job is None:
+            return None
+        task = self._tasks.get(job_id)
+        job["active"] = task is not None and not task.done()
+        if job["active"]:
+            job["items_fetched"] = self._progress.get(job_id, job["items_written"])
+        elif job["status"] in ("running", "waiting"):
+            # توقفت العملية السابقة قبل اكتمال المهمة
+            job["status"] = "interrupted"
+        return job
+
+    async def list(self, username: Optional[str] = None) -> List[Dict]:
+        jobs = await asyncio.to_thread(db_manager.get_crawl_jobs, username)
+        return [await self.status(job["job_id"]) for job in jobs]
+
+    @staticmethod
+    async def _update(job_id: str, **fields):
+        # تحديث قاعدة البيانات خارج حلقة الأحداث
+        await asyncio.to_thread(db_manager.update_crawl_job, job_id, **fields)
+
+    async def _wait(self, job_id: str, until: float):
+        """انتظار إعادة تعيين الحد مع تسجيل ذلك في حالة المهمة"""
+        await self._update(job_id, status="waiting", waiting_until=until)
+        logger.info(f"Crawl job {job_id} waiting {int(until - time.time())}s for the rate limit window")
+        await asyncio.sleep(max(until - time.time(), 1))
+        await self._update(job_id, status="running", waiting_until=None)
+
+    async def _run(self, job: Dict, fetch: Callable[..., Awaitable]):
+        job_id = job["job_id"]
+        method = CRAWL_METHODS[job["direction"]]
+        writer_class = NDJSONWriter if job["output_format"] == "ndjson" else ParquetWriter
+        try:
+            writer = await asyncio.to_thread(writer_class, job["output_path"], job["checkpoint"])
+        except Exception as e:
+            await self._update(job_id, status="failed", error=str(e))
+            return
+
+        # نقطة الاستئناف المحفوظة، والتقدم منذ آخر حفظ
+        token = job["pagination_token"]
+        pages = job["pages"]
+        self._progress[job_id] = job["items_written"]
+        await self._update(job_id, status="running", error=None, waiting_until=None)
+        try:
+            while True:
+                try:
+                    page = await fetch(
+                        job["username"], method,
+                        id=job["target_user_id"], max_results=CRAWL_PAGE_SIZE, pagination_token=token,
+                        user_fields=CRAWL_USER_FIELDS, priority=PRIORITY_BULK,
+                        max_wait=config.CRAWLER_MAX_WAIT_SECONDS
+                    )
+                except RateLimitExceeded as e:
+                    await self._wait(job_id, e.reset_at)
+                    continue
+                except tweepy.TooManyRequests as e:
+                    await self._wait(job_id, time.time() + (get_retry_after(e) or DEFAULT_WINDOW_SECONDS))
+                    continue
+
+                records = [user.data for user in page.data or []]
+                token = (page.meta or {}).get("next_token")
+                pages += 1
+                self._progress[job_id] += len(records)
+                checkpoint = await asyncio.to_thread(writer.write_page, records)
+                if checkpoint is not None and token:
+                    # الصفحات حتى هنا محفوظة على القرص؛ الاستئناف يبدأ من token
+                    await self._update(
+                        job_id, pagination_token=token, items_written=self._progress[job_id],
+                        checkpoint=checkpoint, pages=pages
+                    )
+                if not token:
+                    break
+
+            checkpoint = await asyncio.to_thread(writer.close)
+            await self._update(
+                job_id, status="completed", pagination_token=None,
+                items_written=self._progress[job_id], checkpoint=checkpoint, pages=pages
+            )
+            logger.info(f"Crawl job {job_id} completed with {self._progress[job_id]} records")
+        except asyncio.CancelledError:
+            writer.abort()
+            # الإلغاء قد يصل أثناء انتظار آخر؛ الحفظ محمي منه
+            await asyncio.shield(self._update(job_id, status="cancelled", waiting_until=None))
+            raise
+        except Exception as e:
+            writer.abort()
+            logger.error(f"Crawl job {job_id} failed: {e}")
+            await self._update(job_id, status="failed", error=str(e), waiting_until=None)
+        finally:
+            self._progress.pop(job_id, None)
+
+# إنشاء الزاحف العام
+graph_crawler = GraphCrawler()
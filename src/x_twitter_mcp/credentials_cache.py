@@ -0,0 +1,114 @@
+import threading
+import time
+import logging
+from typing import Dict, Optional
+import tweepy
+from .config import config
+from .database import db_manager
+
+logger = logging.getLogger(__name__)
+
+class CredentialStatus:
+    """حالة صلاحية مفاتيح حساب"""
+
+    __slots__ = ("is_valid", "checked_at", "user_id")
+
+    def __init__(self, is_valid: bool, user_id: Optional[str] = None):
+        self.is_valid = is_valid
+        self.checked_at = time.monotonic()
+        self.user_id = user_id
+
+class CredentialStatusCache:
+    """ذاكرة مؤقتة لصلاحية مفاتيح المصادقة مع تحديث في الخلفية"""
+
+    def __init__(self, ttl: float, negative_ttl: float):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[str, CredentialStatus] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, status: CredentialStatus) -> bool:
+        """هل ما زالت الحالة ضمن مدة صلاحيتها"""
+        ttl = self.ttl if status.is_valid else self.negative_ttl
+        return time.monotonic() - status.checked_at < ttl
+
+    def get(self, username: str) -> Optional[CredentialStatus]:
+        """الحصول على الحالة المحفوظة إن وجدت"""
+        return self._entries.get(username)
+
+    def is_invalid(self, username: str) -> bool:
+        """هل المفاتيح معروفة بأنها غير صحيحة (ذاكرة سلبية)"""
+        status = self._entries.get(username)
+        return status is not None and not status.is_valid and self._is_fresh(status)
+
+    def mark_valid(self, username: str, user_id: Optional[str] = None):
+        """تسجيل المفاتيح كصحيحة"""
+        with self._lock:
+            previous = self._entries.get(username)
+            if user_id is None and previous is not None:
+                user_id = previous.user_id
+            self._entries[username] = CredentialStatus(True, user_id)
+
+    def mark_invalid(self, username: str):
+        """تسجيل المفاتيح كغير صحيحة"""
+        with self._lock:
+            self._entries[username] = CredentialStatus(False)
+        logger.warning(f"Credentials for '{username}' marked invalid")
+
+    def invalidate(self, username: str):
+        """حذف الحالة المحفوظة لحساب"""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def validate(self, username: str, client: tweepy.Client) -> Optional[bool]:
+        """التحقق المباشر عبر get_me وتحديث الحالة
+
+        Returns:
+            Optional[bool]: None إذا تعذّر التحقق لسبب غير متعلق بالمفاتيح
+        """
+        try:
+            me = client.get_me()
+        except (tweepy.Unauthorized, tweepy.Forbidden):
+            self.mark_invalid(username)
+            return False
+        except Exception as e:
+            logger.warning(f"Could not validate credentials for '{username}': {e}")
+            return None
+
+        if me.data is None:
+            self.mark_invalid(username)
+            return False
+        self.mark_valid(username, str(me.data.id))
+        return True
+
+    def refresh_in_background(self, username: str, client: tweepy.Client):
+        """تحديث الحالة في خيط منفصل دون حجب الطلب الحالي"""
+        with self._lock:
+            if username in self._refreshing:
+                return
+            self._refreshing.add(username)
+
+        def run():
+            try:
+                self.validate(username, client)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(username)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def ensure_fresh(self, username: str, client: tweepy.Client):
+        """جدولة تحديث في الخلفية إذا كانت الحالة مفقودة أو منتهية"""
+        status = self._entries.get(username)
+        if status is None or not self._is_fresh(status):
+            self.refresh_in_background(username, client)
+
+# إنشاء ذاكرة حالة المفاتيح العامة
+credentials_cache = CredentialStatusCache(
+    ttl=config.CREDENTIALS_CACHE_TTL_SECONDS,
+    negative_ttl=config.CREDENTIALS_NEGATIVE_TTL_SECONDS
+)
+
+# حذف الحالة عند تغيّر بيانات الحساب
+db_manager.add_account_listener(credentials_cache.invalidate)
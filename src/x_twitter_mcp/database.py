@@ -1,8 +1,8 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Boolean
+from sqlalchemy import create_engine, Column, String, DateTime, Boolean, Integer, Float, LargeBinary
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 from datetime import datetime, timezone
 import os
-from typing import Optional, List
+from typing import Optional, List, Callable
 import json
 
 # إنشاء قاعدة البيانات
@@ -69,12 +69,133 @@ class TwitterAccount(Base):
             is_active=self.is_active
         )
 
+class RateLimitState(Base):
+    """حالة حد الطلبات لحساب ونقطة نهاية (مشتركة بين العمليات)"""
+    __tablename__ = "rate_limit_state"
+    
+    username = Column(String, primary_key=True)
+    endpoint = Column(String, primary_key=True)
+    request_limit = Column(Integer, nullable=False)
+    remaining = Column(Integer, nullable=False)
+    reset_at = Column(Float, nullable=False)
+
+class FeedSyncState(Base):
+    """آخر تغريدة معروفة (since_id) لكل حساب وخلاصة، للمزامنة التزايدية"""
+    __tablename__ = "feed_sync_state"
+    
+    username = Column(String, primary_key=True)
+    feed = Column(String, primary_key=True)
+    since_id = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=get_utc_now, onupdate=get_utc_now)
+
+class SeenTweets(Base):
+    """معرّفات التغريدات التي رآها حساب، كمصفوفة uint64 مرتبة"""
+    __tablename__ = "seen_tweets"
+    
+    username = Column(String, primary_key=True)
+    tweet_ids = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=get_utc_now, onupdate=get_utc_now)
+
+class CrawlJob(Base):
+    """مهمة زحف لقائمة المتابعين أو المتابَعين مع نقطة استئناف"""
+    __tablename__ = "crawl_jobs"
+    
+    job_id = Column(String, primary_key=True)
+    username = Column(String, nullable=False, index=True)
+    target_user_id = Column(String, nullable=False)
+    direction = Column(String, nullable=False)
+    output_format = Column(String, nullable=False)
+    output_path = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    pagination_token = Column(String, nullable=True)
+    # نقطة الاستئناف: موضع البايت في NDJSON أو عدد ملفات Parquet المكتملة
+    items_written = Column(Integer, nullable=False, default=0)
+    checkpoint = Column(Integer, nullable=False, default=0)
+    pages = Column(Integer, nullable=False, default=0)
+    waiting_until = Column(Float, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=get_utc_now)
+    updated_at = Column(DateTime, default=get_utc_now, onupdate=get_utc_now)
+    
+    def to_dict(self):
+        """تحويل النموذج إلى قاموس"""
+        return {
+            "job_id": self.job_id,
+            "username": self.username,
+            "target_user_id": self.target_user_id,
+            "direction": self.direction,
+            "output_format": self.output_format,
+            "output_path": self.output_path,
+            "status": self.status,
+            "pagination_token": self.pagination_token,
+            "items_written": self.items_written,
+            "checkpoint": self.checkpoint,
+            "pages": self.pages,
+            "waiting_until": self.waiting_until,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class MediaUploadSession(Base):
+    """جلسة رفع وسائط مجزأ مع المقاطع المستلمة، لاستئناف الرفع بعد الانقطاع"""
+    __tablename__ = "media_upload_sessions"
+    
+    session_id = Column(String, primary_key=True)
+    username = Column(String, nullable=False, index=True)
+    file_path = Column(String, nullable=False)
+    file_size = Column(Integer, nullable=False)
+    file_mtime = Column(Float, nullable=False)
+    media_id = Column(String, nullable=False)
+    segment_size = Column(Integer, nullable=False)
+    # قائمة JSON بأرقام المقاطع التي أكدت X استلامها
+    acked_segments = Column(String, nullable=False, default="[]")
+    expires_at = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=get_utc_now)
+    
+    def to_dict(self):
+        """تحويل النموذج إلى قاموس"""
+        return {
+            "session_id": self.session_id,
+            "username": self.username,
+            "file_path": self.file_path,
+            "file_size": self.file_size,
+            "file_mtime": self.file_mtime,
+            "media_id": self.media_id,
+            "segment_size": self.segment_size,
+            "acked_segments": json.loads(self.acked_segments),
+            "expires_at": self.expires_at
+        }
+
+class CachedMedia(Base):
+    """وسائط مرفوعة مسبقاً حسب بصمة المحتوى والحساب المالك، لإعادة استخدامها قبل انتهائها"""
+    __tablename__ = "media_cache"
+    
+    content_hash = Column(String, primary_key=True)
+    username = Column(String, primary_key=True)
+    media_id = Column(String, nullable=False)
+    expires_at = Column(Float, nullable=False, index=True)
+    created_at = Column(DateTime, default=get_utc_now)
+
 class DatabaseManager:
     """مدير قاعدة البيانات"""
     
     def __init__(self):
         self.engine = engine
         self.SessionLocal = SessionLocal
+        self._account_listeners: List[Callable[[str], None]] = []
+        
+    def add_account_listener(self, listener: Callable[[str], None]):
+        """تسجيل دالة تُستدعى عند تغيّر بيانات حساب"""
+        self._account_listeners.append(listener)
+    
+    def notify_account_changed(self, username: str):
+        """إبلاغ المستمعين بتغيّر بيانات حساب"""
+        for listener in self._account_listeners:
+            try:
+                listener(username)
+            except Exception as e:
+                print(f"خطأ في إبلاغ تغيّر الحساب: {e}")
         
     def create_tables(self):
         """إنشاء جداول قاعدة البيانات"""
@@ -119,7 +240,8 @@ class DatabaseManager:
                     session.add(new_account)
                 
                 session.commit()
-                return True
+            self.notify_account_changed(username)
+            return True
         except Exception as e:
             print(f"خطأ في إضافة الحساب: {e}")
             return False
@@ -171,6 +293,7 @@ class DatabaseManager:
                 if account:
                     session.delete(account)
                     session.commit()
+                    self.notify_account_changed(username)
                     return True
                 return False
         except Exception as e:
@@ -188,12 +311,200 @@ class DatabaseManager:
                 if account:
                     account.is_active = False
                     session.commit()
+                    self.notify_account_changed(username)
                     return True
                 return False
         except Exception as e:
             print(f"خطأ في إلغاء تفعيل الحساب: {e}")
             return False
     
+    def get_since_id(self, username: str, feed: str) -> Optional[str]:
+        """الحصول على آخر since_id محفوظ لخلاصة"""
+        try:
+            with self.get_session() as session:
+                state = session.get(FeedSyncState, (username, feed))
+                return state.since_id if state else None
+        except Exception as e:
+            print(f"خطأ في قراءة حالة المزامنة: {e}")
+            return None
+    
+    def set_since_id(self, username: str, feed: str, since_id: str) -> bool:
+        """حفظ since_id جديد لخلاصة؛ لا يتراجع إذا سبقته عملية أخرى"""
+        try:
+            with self.get_session() as session:
+                state = session.get(FeedSyncState, (username, feed))
+                if state:
+                    if int(state.since_id) < int(since_id):
+                        state.since_id = since_id
+                else:
+                    session.add(FeedSyncState(username=username, feed=feed, since_id=since_id))
+                session.commit()
+                return True
+        except Exception as e:
+            print(f"خطأ في حفظ حالة المزامنة: {e}")
+            return False
+    
+    def get_seen_tweets(self, username: str) -> Optional[bytes]:
+        """الحصول على معرّفات التغريدات المرئية لحساب"""
+        try:
+            with self.get_session() as session:
+                state = session.get(SeenTweets, username)
+                return state.tweet_ids if state else None
+        except Exception as e:
+            print(f"خطأ في قراءة التغريدات المرئية: {e}")
+            return None
+    
+    def merge_seen_tweets(self, username: str, merge: Callable[[Optional[bytes]], bytes]) -> Optional[bytes]:
+        """دمج معرّفات التغريدات المرئية مع المحفوظة وحفظ الناتج في معاملة واحدة
+
+        يُقفل الجدول للكتابة قبل القراءة، فلا تضيع معرّفات حفظتها عملية أخرى في نفس الوقت.
+        """
+        try:
+            with self.get_session() as session:
+                session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                state = session.get(SeenTweets, username)
+                tweet_ids = merge(state.tweet_ids if state else None)
+                if state:
+                    state.tweet_ids = tweet_ids
+                else:
+                    session.add(SeenTweets(username=username, tweet_ids=tweet_ids))
+                session.commit()
+                return tweet_ids
+        except Exception as e:
+            print(f"خطأ في حفظ التغريدات المرئية: {e}")
+            return None
+    
+    def create_crawl_job(self, **fields) -> Optional[dict]:
+        """إنشاء مهمة زحف"""
+        try:
+            with self.get_session() as session:
+                job = CrawlJob(**fields)
+                session.add(job)
+                session.commit()
+                return job.to_dict()
+        except Exception as e:
+            print(f"خطأ في إنشاء مهمة الزحف: {e}")
+            return None
+    
+    def get_crawl_job(self, job_id: str) -> Optional[dict]:
+        """الحصول على مهمة زحف"""
+        try:
+            with self.get_session() as session:
+                job = session.get(CrawlJob, job_id)
+                return job.to_dict() if job else None
+        except Exception as e:
+            print(f"خطأ في الحصول على مهمة الزحف: {e}")
+            return None
+    
+    def get_crawl_jobs(self, username: Optional[str] = None) -> List[dict]:
+        """الحصول على مهام الزحف، الأحدث أولاً"""
+        try:
+            with self.get_session() as session:
+                query = session.query(CrawlJob)
+                if username:
+                    query = query.filter(CrawlJob.username == username)
+                return [job.to_dict() for job in query.order_by(CrawlJob.created_at.desc()).all()]
+        except Exception as e:
+            print(f"خطأ في الحصول على مهام الزحف: {e}")
+            return []
+    
+    def update_crawl_job(self, job_id: str, **fields) -> bool:
+        """تحديث مهمة زحف (نقطة الاستئناف أو الحالة)"""
+        try:
+            with self.get_session() as session:
+                job = session.get(CrawlJob, job_id)
+                if not job:
+                    return False
+                for key, value in fields.items():
+                    setattr(job, key, value)
+                session.commit()
+                return True
+        except Exception as e:
+            print(f"خطأ في تحديث مهمة الزحف: {e}")
+            return False
+    
+    def find_media_upload_session(self, username: str, file_path: str, file_size: int,
+                                  file_mtime: float) -> Optional[dict]:
+        """البحث عن جلسة رفع غير مكتملة لنفس الملف دون تعديل"""
+        try:
+            with self.get_session() as session:
+                upload = session.query(MediaUploadSession).filter(
+                    MediaUploadSession.username == username,
+                    MediaUploadSession.file_path == file_path,
+                    MediaUploadSession.file_size == file_size,
+                    MediaUploadSession.file_mtime == file_mtime
+                ).first()
+                return upload.to_dict() if upload else None
+        except Exception as e:
+            print(f"خطأ في البحث عن جلسة الرفع: {e}")
+            return None
+    
+    def save_media_upload_session(self, session_id: str, **fields) -> bool:
+        """إنشاء جلسة رفع أو تحديثها"""
+        try:
+            if "acked_segments" in fields:
+                fields["acked_segments"] = json.dumps(sorted(fields["acked_segments"]))
+            with self.get_session() as session:
+                upload = session.get(MediaUploadSession, session_id)
+                if upload:
+                    for key, value in fields.items():
+                        setattr(upload, key, value)
+                else:
+                    session.add(MediaUploadSession(session_id=session_id, **fields))
+                session.commit()
+                return True
+        except Exception as e:
+            print(f"خطأ في حفظ جلسة الرفع: {e}")
+            return False
+    
+    def delete_media_upload_session(self, session_id: str):
+        """حذف جلسة رفع مكتملة أو منتهية"""
+        try:
+            with self.get_session() as session:
+                session.query(MediaUploadSession).filter(
+                    MediaUploadSession.session_id == session_id
+                ).delete()
+                session.commit()
+        except Exception as e:
+            print(f"خطأ في حذف جلسة الرفع: {e}")
+    
+    def get_cached_media(self, username: str, content_hash: str, now: float) -> Optional[str]:
+        """الحصول على media_id ساري لنفس المحتوى والحساب"""
+        try:
+            with self.get_session() as session:
+                media = session.get(CachedMedia, (content_hash, username))
+                return media.media_id if media and media.expires_at > now else None
+        except Exception as e:
+            print(f"خطأ في قراءة ذاكرة الوسائط: {e}")
+            return None
+    
+    def save_cached_media(self, username: str, content_hash: str, media_id: str, expires_at: float, now: float):
+        """حفظ وسائط مرفوعة وحذف المنتهية"""
+        try:
+            with self.get_session() as session:
+                session.query(CachedMedia).filter(CachedMedia.expires_at <= now).delete()
+                session.merge(CachedMedia(
+                    content_hash=content_hash,
+                    username=username,
+                    media_id=media_id,
+                    expires_at=expires_at
+                ))
+                session.commit()
+        except Exception as e:
+            print(f"خطأ في حفظ ذاكرة الوسائط: {e}")
+    
+    def delete_cached_media(self, username: str, media_ids: List[str]):
+        """حذف وسائط رفضتها X من الذاكرة"""
+        try:
+            with self.get_session() as session:
+                session.query(CachedMedia).filter(
+                    CachedMedia.username == username,
+                    CachedMedia.media_id.in_(media_ids)
+                ).delete(synchronize_session=False)
+                session.commit()
+        except Exception as e:
+            print(f"خطأ في حذف ذاكرة الوسائط: {e}")
+    
     def test_credentials(self, username: str) -> bool:
         """اختبار صحة مفاتيح المصادقة"""
         try:
@@ -0,0 +1,106 @@
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+# مسارات الأولوية: الأصغر يُخدم أولاً
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+class PrioritySemaphore:
+    """Semaphore يمنح الأماكن المتاحة حسب الأولوية ثم ترتيب الوصول"""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: list = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # إذا مُنح المكان قبل الإلغاء نعيده لغيرنا
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+class TwitterExecutor:
+    """تنفيذ طلبات tweepy المتزامنة خارج حلقة الأحداث مع حدود للتوازي"""
+
+    def __init__(self, max_workers: int, max_concurrency: int, max_concurrency_per_account: int):
+        self.max_concurrency = max_concurrency
+        self.max_concurrency_per_account = max_concurrency_per_account
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twitter-api")
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._account_semaphores: Dict[str, PrioritySemaphore] = {}
+
+    def _get_semaphores(self, username: str) -> tuple[asyncio.Semaphore, PrioritySemaphore]:
+        """الحصول على حدود التوازي العامة وحدود الحساب"""
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        account_semaphore = self._account_semaphores.get(username)
+        if account_semaphore is None:
+            account_semaphore = PrioritySemaphore(self.max_concurrency_per_account)
+            self._account_semaphores[username] = account_semaphore
+        return self._global_semaphore, account_semaphore
+
+    async def run(self, username: str, func: Callable, *args, priority: int = PRIORITY_NORMAL,
+                  timeout: Optional[float] = None, **kwargs):
+        """تشغيل دالة متزامنة في مجموعة الخيوط ضمن حدود الحساب
+
+        timeout يبدأ بعد الحصول على مكان، فلا يشمل الانتظار في الطابور.
+        """
+        global_semaphore, account_semaphore = self._get_semaphores(username)
+        await account_semaphore.acquire(priority)
+        try:
+            async with global_semaphore:
+                loop = asyncio.get_running_loop()
+                # نسخ السياق حتى تبقى متغيرات السياق متاحة داخل الخيط
+                context = contextvars.copy_context()
+                call = functools.partial(context.run, func, *args, **kwargs)
+                return await asyncio.wait_for(loop.run_in_executor(self._pool, call), timeout)
+        finally:
+            account_semaphore.release()
+
+    async def run_async(self, username: str, coro_factory: Callable, priority: int = PRIORITY_NORMAL,
+                        timeout: Optional[float] = None):
+        """تشغيل طلب غير متزامن ضمن نفس حدود التوازي دون استهلاك خيط"""
+        global_semaphore, account_semaphore = self._get_semaphores(username)
+        await account_semaphore.acquire(priority)
+        try:
+            async with global_semaphore:
+                return await asyncio.wait_for(coro_factory(), timeout)
+        finally:
+            account_semaphore.release()
+
+    def shutdown(self):
+        """إيقاف مجموعة الخيوط"""
+        self._pool.shutdown(wait=False)
+
+# إنشاء منفّذ الطلبات العام
+twitter_executor = TwitterExecutor(
+    max_workers=config.TWITTER_MAX_WORKERS,
+    max_concurrency=config.TWITTER_MAX_CONCURRENCY,
+    max_concurrency_per_account=config.TWITTER_MAX_CONCURRENCY_PER_ACCOUNT
+)
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from .config import config
+from .database import db_manager
+
+class FeedSync:
+    """مزامنة تزايدية للخلاصات: since_id محفوظ في قاعدة البيانات وحلقة لآخر التغريدات في الذاكرة"""
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._buffers: Dict[Tuple[str, str], Deque] = {}
+        self._lock = threading.Lock()
+
+    async def get_since_id(self, username: str, feed: str) -> Optional[str]:
+        """آخر تغريدة معروفة للخلاصة؛ تُقرأ من قاعدة البيانات كل مرة لأن عمليات أخرى قد ترفعها"""
+        return await asyncio.to_thread(db_manager.get_since_id, username, feed)
+
+    async def record(self, username: str, feed: str, tweets: List, newest_id: Optional[str] = None):
+        """إضافة التغريدات الجديدة إلى الحلقة ورفع since_id"""
+        if not tweets:
+            return
+        newest_id = newest_id or max((str(tweet.id) for tweet in tweets), key=int)
+        with self._lock:
+            buffer = self._buffers.setdefault((username, feed), deque(maxlen=self.buffer_size))
+            # الأقدم أولاً حتى تبقى الأحدث في نهاية الحلقة
+            buffer.extend(sorted(tweets, key=lambda tweet: int(tweet.id)))
+        await asyncio.to_thread(db_manager.set_since_id, username, feed, newest_id)
+
+    def recent(self, username: str, feed: str, count: Optional[int] = None) -> List:
+        """آخر التغريدات المحفوظة في الحلقة، الأحدث أولاً"""
+        with self._lock:
+            tweets = list(self._buffers.get((username, feed), ()))
+        tweets.reverse()
+        return tweets[:count] if count else tweets
+
+# إنشاء مزامن الخلاصات العام
+feed_sync = FeedSync(buffer_size=config.FEED_BUFFER_SIZE)
@@ -0,0 +1,111 @@
+import logging
+from array import array
+from typing import Awaitable, Callable, Dict, Tuple
+import tweepy
+from .cache import TTLCache
+from .config import config
+from .executor import PRIORITY_BULK
+from .rate_limiter import RateLimitExceeded
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+GRAPH_METHODS = {
+    "followers": "get_users_followers",
+    "following": "get_users_following"
+}
+
+def sort_unique(ids: array) -> array:
+    """ترتيب المعرّفات وإزالة المكرر"""
+    if numpy is not None:
+        return array("Q", numpy.unique(numpy.frombuffer(ids, dtype=numpy.uint64)).tobytes())
+    return array("Q", sorted(set(ids)))
+
+def intersect_sorted(left: array, right: array) -> array:
+    """تقاطع مصفوفتين مرتبتين من المعرّفات، متجهياً عبر numpy إن توفرت"""
+    if numpy is not None:
+        common = numpy.intersect1d(
+            numpy.frombuffer(left, dtype=numpy.uint64),
+            numpy.frombuffer(right, dtype=numpy.uint64),
+            assume_unique=True
+        )
+        return array("Q", common.tobytes())
+    if len(left) > len(right):
+        left, right = right, left
+    # مجموعة الأصغر فقط؛ المرور على الأكبر بالترتيب يُبقي الناتج مرتباً
+    smaller = set(left)
+    return array("Q", (user_id for user_id in right if user_id in smaller))
+
+class FollowGraphCache:
+    """معرّفات المتابعين/المتابَعين لكل (حساب، مستخدم) كمصفوفات uint64 مرتبة بمدة صلاحية
+
+    القوائم الكبيرة تتجاوز حد 15 طلباً لكل 15 دقيقة، فيُحفظ التحميل الجزئي مع
+    pagination_token ويُستأنف في الطلب التالي بدلاً من البدء من جديد.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_ids: int):
+        self.max_ids = max_ids
+        self._graphs = TTLCache(ttl, max_entries=max(max_bytes // 8, 1), max_bytes=max_bytes)
+        # التحميلات غير المكتملة: (المعرّفات حتى الآن، token الصفحة التالية)
+        self._partials = TTLCache(ttl, max_entries=max(max_bytes // 8, 1), max_bytes=max_bytes)
+        self._in_flight = SingleFlight()
+
+    async def get_ids(self, username: str, user_id: str, direction: str,
+                      fetch: Callable[..., Awaitable]) -> Tuple[array, bool]:
+        """المعرّفات المرتبة وهل اكتملت (False إذا تجاوزت max_ids أو أوقفها حد الطلبات)"""
+        # مفصولة لكل حساب: قوائم الحسابات المحمية لا تظهر إلا لمن يتابعها
+        key = (username, str(user_id), direction)
+        cached = self._graphs.get(key)
+        if cached is not None:
+            return cached
+        return await self._in_flight.do(key, lambda: self._load(key, fetch))
+
+    async def _load(self, key: Tuple[str, str, str], fetch: Callable[..., Awaitable]):
+        username, user_id, direction = key
+        ids, token = self._partials.get(key) or (array("Q"), None)
+        complete = True
+        while True:
+            try:
+                page = await fetch(
+                    username, GRAPH_METHODS[direction], id=user_id, max_results=1000,
+                    pagination_token=token, priority=PRIORITY_BULK
+                )
+            except (RateLimitExceeded, tweepy.TooManyRequests) as e:
+                if not ids:
+                    raise
+                # حفظ ما جُمع للاستئناف بعد إعادة تعيين الحد
+                logger.info(f"{direction} of {user_id} paused at {len(ids)} IDs: {e}")
+                self._partials.set(key, (ids, token), size=len(ids) * ids.itemsize)
+                return sort_unique(ids), False
+            # نُبقي المعرّفات فقط دون قواميس المستخدمين
+            ids.extend(int(user.id) for user in page.data or [])
+            token = (page.meta or {}).get("next_token")
+            if not token:
+                break
+            if len(ids) >= self.max_ids:
+                logger.warning(f"{direction} of {user_id} truncated at {len(ids)} IDs")
+                complete = False
+                break
+
+        self._partials.delete(key)
+        ids = sort_unique(ids)
+        result = (ids, complete)
+        self._graphs.set(key, result, size=len(ids) * ids.itemsize)
+        return result
+
+    def stats(self) -> Dict:
+        stats = self._graphs.stats()
+        stats["partial_loads"] = len(self._partials)
+        return stats
+
+# إنشاء ذاكرة الرسوم العامة
+follow_graph_cache = FollowGraphCache(
+    ttl=config.GRAPH_CACHE_TTL_SECONDS,
+    max_bytes=config.GRAPH_CACHE_MAX_BYTES,
+    max_ids=config.GRAPH_MAX_IDS
+)
@@ -0,0 +1,178 @@
+import socket
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+class PoolStats:
+    """إحصائيات مجموعة الاتصالات المشتركة"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.waits = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def record_wait(self):
+        with self._lock:
+            self.waits += 1
+
+    def to_dict(self) -> Dict:
+        """تحويل الإحصائيات إلى قاموس"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hits": max(self.requests - self.new_connections, 0),
+                "new_connections": self.new_connections,
+                "waits": self.waits
+            }
+
+# إحصائيات منفصلة لكل من requests (v1.1 و v2 المتزامن) و aiohttp (AsyncClient)
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+# دوال تُستدعى مع (رمز الحالة، الترويسات) لكل استجابة من أي من الجلستين
+_response_listeners: List[Callable[[int, Dict], None]] = []
+
+def add_response_listener(listener: Callable[[int, Dict], None]):
+    """تسجيل دالة تستقبل رمز الحالة وترويسات كل استجابة"""
+    _response_listeners.append(listener)
+
+def _notify_response(status: int, headers):
+    """إبلاغ المستمعين باستجابة جديدة"""
+    for listener in _response_listeners:
+        try:
+            listener(status, headers)
+        except Exception as e:
+            logger.warning(f"Response listener failed: {e}")
+
+class _CountingPoolMixin:
+    """عدّ الطلبات والاتصالات الجديدة وحالات الانتظار في urllib3"""
+
+    def _get_conn(self, timeout=None):
+        sync_pool_stats.record_request()
+        # الطابور الفارغ يعني أن جميع الاتصالات مستخدمة
+        if self.block and self.pool is not None and self.pool.empty():
+            sync_pool_stats.record_wait()
+        return super()._get_conn(timeout=timeout)
+
+    def _new_conn(self):
+        sync_pool_stats.record_new_connection()
+        return super()._new_conn()
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+def _keepalive_socket_options() -> list:
+    """خيارات TCP keep-alive للاتصالات الخاملة"""
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, config.HTTP_KEEPALIVE_SECONDS))
+    return options
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """محوّل HTTP بمهلة افتراضية وإحصائيات ومجموعة اتصالات قابلة للضبط"""
+
+    def __init__(self, timeout: Optional[float] = None, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault("socket_options", _keepalive_socket_options())
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        # tweepy.Client لا يحدد مهلة، فنطبّق المهلة الافتراضية
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+def create_shared_session() -> requests.Session:
+    """إنشاء جلسة requests مشتركة بين جميع عملاء الحسابات"""
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(
+        timeout=config.HTTP_TIMEOUT_SECONDS,
+        pool_connections=config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=config.HTTP_POOL_MAXSIZE,
+        pool_block=config.HTTP_POOL_BLOCK
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(
+        lambda response, *args, **kwargs: _notify_response(response.status_code, response.headers)
+    )
+    return session
+
+def create_aiohttp_session():
+    """إنشاء جلسة aiohttp مشتركة بنفس حدود المجموعة (تُنشأ داخل حلقة الأحداث)"""
+    import aiohttp
+
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        async_pool_stats.record_request()
+
+    async def on_connection_create_end(session, context, params):
+        async_pool_stats.record_new_connection()
+
+    async def on_connection_queued_start(session, context, params):
+        async_pool_stats.record_wait()
+
+    async def on_request_end(session, context, params):
+        _notify_response(params.response.status, params.response.headers)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_queued_start.append(on_connection_queued_start)
+    trace_config.on_request_end.append(on_request_end)
+
+    connector = aiohttp.TCPConnector(
+        limit=config.HTTP_POOL_CONNECTIONS * config.HTTP_POOL_MAXSIZE,
+        limit_per_host=config.HTTP_POOL_MAXSIZE,
+        keepalive_timeout=config.HTTP_KEEPALIVE_SECONDS,
+        enable_cleanup_closed=True
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT_SECONDS),
+        trace_configs=[trace_config]
+    )
+
+def get_pool_stats() -> Dict:
+    """إحصائيات مجموعات الاتصالات"""
+    return {
+        "sync": sync_pool_stats.to_dict(),
+        "async": async_pool_stats.to_dict(),
+        "settings": {
+            "pool_connections": config.HTTP_POOL_CONNECTIONS,
+            "pool_maxsize": config.HTTP_POOL_MAXSIZE,
+            "pool_block": config.HTTP_POOL_BLOCK,
+            "keepalive_seconds": config.HTTP_KEEPALIVE_SECONDS,
+            "timeout_seconds": config.HTTP_TIMEOUT_SECONDS
+        }
+    }
+
+# جلسة requests المشتركة العامة
+shared_session = create_shared_session()
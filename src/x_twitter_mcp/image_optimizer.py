@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    # اعتمادية اختيارية: pip install Pillow
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# الصيغ التي تعيد X ضغطها؛ GIF تُرفع كما هي للحفاظ على الحركة
+OPTIMIZABLE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff")
+
+def optimize_image(path: str, max_dimension: int, max_bytes: int, quality: int) -> Optional[str]:
+    """تصغير الصورة وإعادة ضغطها في ملف مؤقت؛ تعيد None إذا لم يكن الناتج أصغر
+
+    تعمل في عملية منفصلة، لذا تبقى دالة على مستوى الوحدة.
+    """
+    original_size = os.path.getsize(path)
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        if max(image.size) > max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        # الشفافية تتطلب PNG؛ غير ذلك JPEG كما تفعل X نفسها
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if has_alpha:
+            # لقطات الشاشة غالباً RGBA بقناة ألفا معتمة بالكامل
+            has_alpha = image.convert("RGBA").getchannel("A").getextrema() != (255, 255)
+        suffix = ".png" if has_alpha else ".jpg"
+        if not has_alpha and image.mode != "RGB":
+            image = image.convert("RGB")
+
+        handle, output = tempfile.mkstemp(suffix=suffix, prefix="x-media-")
+        os.close(handle)
+        try:
+            while True:
+                if has_alpha:
+                    image.save(output, "PNG", optimize=True)
+                else:
+                    image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+                if os.path.getsize(output) <= max_bytes or has_alpha or quality <= 50:
+                    break
+                quality -= 10
+        except BaseException:
+            os.remove(output)
+            raise
+
+    if os.path.getsize(output) >= original_size:
+        os.remove(output)
+        return None
+    return output
+
+class ImageOptimizer:
+    """مرحلة اختيارية قبل الرفع لتصغير الصور في مجموعة عمليات منفصلة"""
+
+    def __init__(self, max_workers: int, max_dimension: int, max_bytes: int, quality: int, min_bytes: int):
+        self.max_workers = max_workers
+        self.max_dimension = max_dimension
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.min_bytes = min_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.optimized = 0
+        self.bytes_saved = 0
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # تُنشأ عند أول استخدام حتى لا تبدأ العمليات إذا كانت المرحلة غير مستخدمة
+        if self._pool is None:
+            # spawn بدل fork: الخادم يملك خيوطاً وأقفالاً قد تُنسخ في حالة مقفلة
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def optimize(self, path: str) -> Optional[str]:
+        """مسار ملف مؤقت محسّن، أو None لرفع الأصل كما هو"""
+        if not self.available or not path.lower().endswith(OPTIMIZABLE_EXTENSIONS):
+            return None
+        if os.path.getsize(path) < self.min_bytes:
+            return None
+        try:
+            output = await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), optimize_image, path, self.max_dimension, self.max_bytes, self.quality
+            )
+        except Exception as e:
+            logger.warning(f"Image optimization failed for {path}, uploading original: {e}")
+            return None
+        if output is not None:
+            self.optimized += 1
+            self.bytes_saved += os.path.getsize(path) - os.path.getsize(output)
+        return output
+
+    def stats(self) -> Dict:
+        return {
+            "available": self.available,
+            "optimized": self.optimized,
+            "bytes_saved": self.bytes_saved
+        }
+
+# إنشاء مُحسّن الصور العام
+image_optimizer = ImageOptimizer(
+    max_workers=config.IMAGE_OPTIMIZER_WORKERS,
+    max_dimension=config.IMAGE_MAX_DIMENSION,
+    max_bytes=config.IMAGE_MAX_BYTES,
+    quality=config.IMAGE_JPEG_QUALITY,
+    min_bytes=config.IMAGE_OPTIMIZE_MIN_BYTES
+)
@@ -0,0 +1,50 @@
+import asyncio
+import hashlib
+import time
+from typing import Dict, List, Optional
+from .config import config
+from .database import db_manager
+
+# حجم القراءة عند حساب البصمة؛ لا يُحمَّل الملف كاملاً في الذاكرة
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(path: str) -> str:
+    """بصمة SHA-256 لمحتوى الملف بقراءة متدفقة"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class MediaCache:
+    """إعادة استخدام media_id لنفس المحتوى والحساب خلال مدة صلاحية الوسائط في X"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def content_hash(self, path: str) -> str:
+        return await asyncio.to_thread(hash_file, path)
+
+    async def get(self, username: str, content_hash: str) -> Optional[str]:
+        media_id = await asyncio.to_thread(db_manager.get_cached_media, username, content_hash, time.time())
+        if media_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return media_id
+
+    async def put(self, username: str, content_hash: str, media_id: str):
+        now = time.time()
+        await asyncio.to_thread(db_manager.save_cached_media, username, content_hash, media_id, now + self.ttl, now)
+
+    async def evict(self, username: str, media_ids: List[str]):
+        """حذف وسائط لم تعد X تقبلها"""
+        await asyncio.to_thread(db_manager.delete_cached_media, username, media_ids)
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+# إنشاء ذاكرة الوسائط العامة
+media_cache = MediaCache(ttl=config.MEDIA_CACHE_TTL_SECONDS)
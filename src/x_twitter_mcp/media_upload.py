@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import mimetypes
+import mmap
+import os
+import time
+import uuid
+from typing import Awaitable, Callable
+from .config import config
+from .database import db_manager
+
+logger = logging.getLogger(__name__)
+
+# حدود الرفع المجزأ في X: 5MB للمقطع و1000 مقطع كحد أقصى
+MAX_SEGMENT_SIZE = 5 * 1024 * 1024
+MAX_SEGMENTS = 1000
+
+class MediaProcessingError(Exception):
+    """فشلت X في معالجة الوسائط بعد رفعها"""
+
+def guess_media_type(path: str) -> str:
+    media_type, _ = mimetypes.guess_type(path)
+    return media_type or "application/octet-stream"
+
+def media_category(media_type: str) -> str:
+    """فئة الوسائط المطلوبة لمعالجة الفيديو وGIF بشكل غير متزامن"""
+    if media_type == "image/gif":
+        return "tweet_gif"
+    if media_type.startswith("video/"):
+        return "tweet_video"
+    return "tweet_image"
+
+def needs_chunked_upload(path: str) -> bool:
+    """الفيديو وGIF والملفات الكبيرة تُرفع مجزأة"""
+    media_type = guess_media_type(path)
+    return (
+        media_type == "image/gif"
+        or media_type.startswith("video/")
+        or os.path.getsize(path) > config.MEDIA_CHUNKED_THRESHOLD_BYTES
+    )
+
+class ChunkedUploader:
+    """رفع مجزأ (INIT/APPEND/FINALIZE/STATUS) بمقاطع متوازية وجلسات قابلة للاستئناف"""
+
+    def __init__(self, segment_size: int, parallel_segments: int, segment_timeout: float,
+                 processing_timeout: float):
+        self.segment_size = segment_size
+        self.parallel_segments = parallel_segments
+        self.segment_timeout = segment_timeout
+        self.processing_timeout = processing_timeout
+
+    def _segment_size(self, file_size: int) -> int:
+        # X تقبل 1000 مقطع كحد أقصى
+        return min(max(self.segment_size, -(-file_size // MAX_SEGMENTS)), MAX_SEGMENT_SIZE)
+
+    async def _start_session(self, username: str, path: str, file_size: int, file_mtime: float,
+                             call: Callable[..., Awaitable]) -> dict:
+        """إيجاد جلسة سارية لنفس الملف أو بدء جلسة جديدة بأمر INIT"""
+        session = await asyncio.to_thread(db_manager.find_media_upload_session, username, path, file_size, file_mtime)
+        if session is not None:
+            if session["expires_at"] > time.time() + 60:
+                logger.info(f"Resuming upload of {path} ({len(session['acked_segments'])} segments already sent)")
+                return session
+            await asyncio.to_thread(db_manager.delete_media_upload_session, session["session_id"])
+
+        media_type = guess_media_type(path)
+        media = await call(
+            username, "chunked_upload_init", api="v1",
+            total_bytes=file_size, media_type=media_type, media_category=media_category(media_type)
+        )
+        session = {
+            "session_id": uuid.uuid4().hex,
+            "username": username,
+            "file_path": path,
+            "file_size": file_size,
+            "file_mtime": file_mtime,
+            "media_id": media.media_id_string,
+            "segment_size": self._segment_size(file_size),
+            "acked_segments": [],
+            "expires_at": time.time() + getattr(media, "expires_after_secs", 24 * 3600)
+        }
+        await asyncio.to_thread(db_manager.save_media_upload_session, **session)
+        return session
+
+    async def _append_segments(self, session: dict, path: str, call: Callable[..., Awaitable]):
+        """إرسال المقاطع المتبقية بالتوازي وحفظ كل مقطع مستلم"""
+        segment_size = session["segment_size"]
+        segments = -(-session["file_size"] // segment_size)
+        acked = set(session["acked_segments"])
+        semaphore = asyncio.Semaphore(self.parallel_segments)
+        # الحفظ بالترتيب حتى لا تكتب نسخة أقدم من المقاطع المستلمة فوق أحدث
+        save_lock = asyncio.Lock()
+
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            async def append(index: int):
+                async with semaphore:
+                    chunk = mapped[index * segment_size:(index + 1) * segment_size]
+                    await call(
+                        session["username"], "chunked_upload_append", api="v1",
+                        media_id=session["media_id"], media=(os.path.basename(path), chunk),
+                        segment_index=index, timeout=self.segment_timeout
+                    )
+                    acked.add(index)
+                    async with save_lock:
+                        await asyncio.to_thread(
+                            db_manager.save_media_upload_session, session["session_id"], acked_segments=sorted(acked)
+                        )
+
+            pending = [asyncio.ensure_future(append(index)) for index in range(segments) if index not in acked]
+            try:
+                await asyncio.gather(*pending)
+            except BaseException:
+                # المقاطع المستلمة محفوظة؛ الاستئناف يرسل الباقي فقط
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                raise
+
+    async def _wait_for_processing(self, username: str, media, call: Callable[..., Awaitable]):
+        """متابعة حالة المعالجة دون حجب حلقة الأحداث"""
+        deadline = time.monotonic() + self.processing_timeout
+        info = getattr(media, "processing_info", None)
+        while info and info.get("state") in ("pending", "in_progress"):
+            if time.monotonic() >= deadline:
+                raise MediaProcessingError(f"Media {media.media_id_string} still processing after {int(self.processing_timeout)}s")
+            await asyncio.sleep(info.get("check_after_secs", 1))
+            media = await call(username, "get_media_upload_status", api="v1", media_id=media.media_id_string)
+            info = getattr(media, "processing_info", None)
+        if info and info.get("state") == "failed":
+            error = info.get("error", {})
+            raise MediaProcessingError(f"Media {media.media_id_string} failed processing: {error.get('message', error)}")
+        return media
+
+    async def upload(self, username: str, path: str, call: Callable[..., Awaitable]) -> str:
+        """رفع ملف مجزأً واستئناف أي جلسة سابقة له؛ تعيد media_id"""
+        stat = os.stat(path)
+        if stat.st_size == 0:
+            raise ValueError(f"Media file is empty: {path}")
+        session = await self._start_session(username, path, stat.st_size, stat.st_mtime, call)
+        await self._append_segments(session, path, call)
+
+        media = await call(username, "chunked_upload_finalize", api="v1", media_id=session["media_id"])
+        # بعد FINALIZE لا يمكن إعادة استخدام الجلسة
+        await asyncio.to_thread(db_manager.delete_media_upload_session, session["session_id"])
+        media = await self._wait_for_processing(username, media, call)
+        return media.media_id_string
+
+# إنشاء أداة الرفع المجزأ العامة
+chunked_uploader = ChunkedUploader(
+    segment_size=config.MEDIA_SEGMENT_SIZE_BYTES,
+    parallel_segments=config.MEDIA_PARALLEL_SEGMENTS,
+    segment_timeout=config.MEDIA_UPLOAD_TIMEOUT_SECONDS,
+    processing_timeout=config.MEDIA_PROCESSING_TIMEOUT_SECONDS
+)
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+from .cache import TTLCache
+from .config import config
+from .rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+class PagePrefetcher:
+    """جلب الصفحة التالية مسبقاً في الخلفية وحفظها لفترة قصيرة بمفتاح next_token"""
+
+    def __init__(self, ttl: float, max_entries: int, min_headroom: float):
+        self.min_headroom = min_headroom
+        # نحفظ مهام الجلب نفسها، فيستفيد الطلب التالي حتى لو لم يكتمل الجلب بعد
+        self._pages = TTLCache(ttl, max_entries, max_bytes=max_entries)
+        self.scheduled = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _consume_error(task: asyncio.Future):
+        # الخطأ يُعاد للمستدعي إن طلب الصفحة؛ وإلا يُسجل فقط
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Prefetch failed: {task.exception()}")
+
+    async def has_headroom(self, username: str, endpoint: str) -> bool:
+        """هل تسمح حدود الطلبات المتبقية بجلب مسبق"""
+        headroom = await rate_limiter.run(rate_limiter.get_headroom, username, endpoint)
+        return headroom is None or headroom >= self.min_headroom
+
+    async def schedule(self, key: Hashable, username: str, endpoint: str, fetch: Callable[[], Awaitable]):
+        """بدء جلب الصفحة التالية إذا توفر هامش كافٍ من الحدود"""
+        if not await self.has_headroom(username, endpoint):
+            self.skipped += 1
+            return
+        task = asyncio.ensure_future(fetch())
+        task.add_done_callback(self._consume_error)
+        self._pages.set(key, task, size=1)
+        self.scheduled += 1
+
+    def take(self, key: Hashable) -> Optional[asyncio.Future]:
+        """أخذ مهمة الصفحة المجلوبة مسبقاً إن وجدت"""
+        task = self._pages.get(key)
+        if task is not None:
+            self._pages.delete(key)
+        return task
+
+    def stats(self) -> Dict:
+        stats = self._pages.stats()
+        return {
+            "scheduled": self.scheduled,
+            "skipped_low_headroom": self.skipped,
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "pending": stats["entries"]
+        }
+
+# إنشاء الجالب المسبق العام
+page_prefetcher = PagePrefetcher(
+    ttl=config.PREFETCH_TTL_SECONDS,
+    max_entries=config.PREFETCH_MAX_ENTRIES,
+    min_headroom=config.PREFETCH_MIN_HEADROOM
+)
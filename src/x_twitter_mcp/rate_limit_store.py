@@ -0,0 +1,213 @@
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .config import config
+from .database import db_manager, RateLimitState
+
+logger = logging.getLogger(__name__)
+
+# نافذة X الافتراضية حتى تصل ترويسات النافذة الجديدة
+DEFAULT_WINDOW_SECONDS = 15 * 60
+
+class MemoryRateLimitBackend:
+    """تخزين حالة الحدود في ذاكرة العملية الحالية فقط"""
+
+    blocking = False
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, username: str, endpoint: str, now: float) -> Optional[float]:
+        with self._lock:
+            bucket = self._buckets.get((username, endpoint))
+            if bucket is None:
+                return None
+            limit, remaining, reset_at = bucket
+            if now >= reset_at:
+                # نافذة جديدة؛ نفترض الحد الكامل حتى تصل الترويسات التالية
+                remaining, reset_at = limit, now + DEFAULT_WINDOW_SECONDS
+            if remaining <= 0:
+                bucket[1], bucket[2] = remaining, reset_at
+                return reset_at
+            bucket[1], bucket[2] = remaining - 1, reset_at
+            return None
+
+    def update(self, username: str, endpoint: str, limit: int, remaining: int, reset_at: float):
+        with self._lock:
+            self._buckets[(username, endpoint)] = [limit, remaining, reset_at]
+
+    def get_reset_at(self, username: str, endpoint: str) -> Optional[float]:
+        bucket = self._buckets.get((username, endpoint))
+        return bucket[2] if bucket is not None else None
+
+    def get_all(self, username: str) -> List[Dict]:
+        with self._lock:
+            return [
+                {"endpoint": endpoint, "limit": bucket[0], "remaining": bucket[1], "reset_at": bucket[2]}
+                for (account, endpoint), bucket in self._buckets.items()
+                if account == username
+            ]
+
+class SQLiteRateLimitBackend:
+    """تخزين حالة الحدود في twitter_accounts.db مع حجز ذري بين العمليات"""
+
+    # عمليات المخزن تنتظر القرص وأقفال SQLite، فتُنفَّذ خارج حلقة الأحداث
+    blocking = True
+
+    def __init__(self, engine=None):
+        self.engine = engine or db_manager.engine
+
+    def try_acquire(self, username: str, endpoint: str, now: float) -> Optional[float]:
+        new_window = RateLimitState.reset_at <= now
+        # عبارة UPDATE واحدة تجعل الحجز ذرياً بين العمليات
+        statement = (
+            update(RateLimitState)
+            .where(
+                RateLimitState.username == username,
+                RateLimitState.endpoint == endpoint,
+                new_window | (RateLimitState.remaining > 0)
+            )
+            .values(
+                remaining=case(
+                    (new_window, RateLimitState.request_limit - 1),
+                    else_=RateLimitState.remaining - 1
+                ),
+                reset_at=case(
+                    (new_window, now + DEFAULT_WINDOW_SECONDS),
+                    else_=RateLimitState.reset_at
+                )
+            )
+        )
+        with self.engine.begin() as connection:
+            if connection.execute(statement).rowcount:
+                return None
+            reset_at = connection.execute(
+                select(RateLimitState.reset_at).where(
+                    RateLimitState.username == username,
+                    RateLimitState.endpoint == endpoint
+                )
+            ).scalar()
+        # لا توجد حالة معروفة لهذه النقطة بعد
+        return reset_at
+
+    def update(self, username: str, endpoint: str, limit: int, remaining: int, reset_at: float):
+        statement = sqlite_insert(RateLimitState).values(
+            username=username,
+            endpoint=endpoint,
+            request_limit=limit,
+            remaining=remaining,
+            reset_at=reset_at
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[RateLimitState.username, RateLimitState.endpoint],
+            set_={
+                "request_limit": statement.excluded.request_limit,
+                "remaining": statement.excluded.remaining,
+                "reset_at": statement.excluded.reset_at
+            }
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement)
+
+    def get_reset_at(self, username: str, endpoint: str) -> Optional[float]:
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(RateLimitState.reset_at).where(
+                    RateLimitState.username == username,
+                    RateLimitState.endpoint == endpoint
+                )
+            ).scalar()
+
+    def get_all(self, username: str) -> List[Dict]:
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(RateLimitState).where(RateLimitState.username == username)
+            ).all()
+        return [
+            {
+                "endpoint": row.endpoint,
+                "limit": row.request_limit,
+                "remaining": row.remaining,
+                "reset_at": row.reset_at
+            }
+            for row in rows
+        ]
+
+class RedisRateLimitBackend:
+    """تخزين حالة الحدود في Redis (أو أي خادم متوافق) مع حجز ذري عبر Lua"""
+
+    KEY_PREFIX = "x_twitter_mcp:rate_limit"
+    blocking = True
+
+    # يعيد -1 عند النجاح أو موعد إعادة التعيين كنص
+    ACQUIRE_SCRIPT = """
+    local limit = redis.call('HGET', KEYS[1], 'limit')
+    if not limit then return -1 end
+    local now = tonumber(ARGV[1])
+    local remaining = tonumber(redis.call('HGET', KEYS[1], 'remaining'))
+    local reset_at = tonumber(redis.call('HGET', KEYS[1], 'reset_at'))
+    if now >= reset_at then
+        remaining = tonumber(limit)
+        reset_at = now + tonumber(ARGV[2])
+        redis.call('HSET', KEYS[1], 'reset_at', tostring(reset_at))
+    end
+    if remaining <= 0 then return tostring(reset_at) end
+    redis.call('HSET', KEYS[1], 'remaining', remaining - 1)
+    return -1
+    """
+
+    def __init__(self, url: str):
+        # اعتمادية اختيارية: pip install redis
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self._acquire = self.redis.register_script(self.ACQUIRE_SCRIPT)
+
+    def _key(self, username: str, endpoint: str) -> str:
+        return f"{self.KEY_PREFIX}:{username}:{endpoint}"
+
+    def try_acquire(self, username: str, endpoint: str, now: float) -> Optional[float]:
+        result = self._acquire(keys=[self._key(username, endpoint)], args=[now, DEFAULT_WINDOW_SECONDS])
+        if isinstance(result, int) and result == -1:
+            return None
+        return float(result)
+
+    def update(self, username: str, endpoint: str, limit: int, remaining: int, reset_at: float):
+        key = self._key(username, endpoint)
+        pipeline = self.redis.pipeline()
+        pipeline.hset(key, mapping={"limit": limit, "remaining": remaining, "reset_at": reset_at})
+        pipeline.expireat(key, int(reset_at + DEFAULT_WINDOW_SECONDS))
+        pipeline.execute()
+
+    def get_reset_at(self, username: str, endpoint: str) -> Optional[float]:
+        value = self.redis.hget(self._key(username, endpoint), "reset_at")
+        return float(value) if value is not None else None
+
+    def get_all(self, username: str) -> List[Dict]:
+        prefix = f"{self.KEY_PREFIX}:{username}:"
+        buckets = []
+        for key in self.redis.scan_iter(match=f"{prefix}*"):
+            values = self.redis.hgetall(key)
+            if not values:
+                continue
+            buckets.append({
+                "endpoint": key.decode()[len(prefix):],
+                "limit": int(values[b"limit"]),
+                "remaining": int(values[b"remaining"]),
+                "reset_at": float(values[b"reset_at"])
+            })
+        return buckets
+
+def create_rate_limit_backend():
+    """إنشاء مخزن الحدود حسب RATE_LIMIT_BACKEND"""
+    backend = config.RATE_LIMIT_BACKEND
+    if backend == "memory":
+        return MemoryRateLimitBackend()
+    if backend == "redis":
+        return RedisRateLimitBackend(config.RATE_LIMIT_REDIS_URL)
+    if backend != "sqlite":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{backend}', using sqlite")
+    return SQLiteRateLimitBackend()
@@ -0,0 +1,219 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from .config import config
+from .executor import PRIORITY_NORMAL
+from .http_pool import add_response_listener
+from .rate_limit_store import create_rate_limit_backend
+
+logger = logging.getLogger(__name__)
+
+# الحساب ونقطة النهاية للطلب الجاري، لربط ترويسات الاستجابة بالحد الصحيح
+current_request: ContextVar[Optional[Tuple[str, str]]] = ContextVar("current_request", default=None)
+
+class RateLimitExceeded(Exception):
+    """تم استنفاد حد الطلبات لنقطة نهاية محلياً"""
+
+    def __init__(self, username: str, endpoint: str, reset_at: float):
+        self.username = username
+        self.endpoint = endpoint
+        self.reset_at = reset_at
+        retry_after = max(int(reset_at - time.time()), 0)
+        super().__init__(
+            f"Rate limit exceeded for '{endpoint}' on account '{username}'; resets in {retry_after}s"
+        )
+
+class RateLimitTracker:
+    """متتبع حدود الطلبات لكل (حساب، نقطة نهاية) من ترويسات x-rate-limit"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def run(self, method, *args):
+        """تنفيذ عملية على المخزن دون حجب حلقة الأحداث إذا كان المخزن متزامناً (SQLite/Redis)"""
+        if not self.backend.blocking:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    def try_acquire(self, username: str, endpoint: str) -> Optional[float]:
+        """محاولة حجز طلب من الحد المشترك
+
+        Returns:
+            Optional[float]: None عند النجاح، وإلا موعد إعادة تعيين الحد
+        """
+        try:
+            return self.backend.try_acquire(username, endpoint, time.time())
+        except Exception as e:
+            # تعطل المخزن المشترك لا يجب أن يوقف الطلبات
+            logger.warning(f"Rate limit backend unavailable: {e}")
+            return None
+
+    def acquire(self, username: str, endpoint: str):
+        """حجز طلب من الحد المحلي أو رفضه قبل أن يعيد X الخطأ 429
+
+        Raises:
+            RateLimitExceeded: إذا كان الحد مستنفداً حتى موعد إعادة التعيين
+        """
+        reset_at = self.try_acquire(username, endpoint)
+        if reset_at is not None:
+            raise RateLimitExceeded(username, endpoint, reset_at)
+
+    def get_reset_at(self, username: str, endpoint: str) -> float:
+        """موعد إعادة تعيين الحد المعروف، أو الآن إذا كان غير معروف"""
+        try:
+            reset_at = self.backend.get_reset_at(username, endpoint)
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable: {e}")
+            reset_at = None
+        return reset_at if reset_at is not None else time.time()
+
+    def update(self, username: str, endpoint: str, limit: int, remaining: int, reset_at: float):
+        """تحديث الحالة من القيم التي أعادتها X"""
+        try:
+            self.backend.update(username, endpoint, limit, remaining, reset_at)
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable: {e}")
+
+    def record_response(self, status: int, headers):
+        """قراءة ترويسات x-rate-limit من استجابة الطلب الجاري"""
+        request = current_request.get()
+        if request is None:
+            return
+        limit = headers.get("x-rate-limit-limit")
+        remaining = headers.get("x-rate-limit-remaining")
+        reset = headers.get("x-rate-limit-reset")
+        if limit is None or remaining is None or reset is None:
+            return
+        try:
+            username, endpoint = request
+            values = (username, endpoint, int(limit), int(remaining), float(reset))
+        except ValueError:
+            logger.warning(f"Invalid rate limit headers: {limit}/{remaining}/{reset}")
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None and self.backend.blocking:
+            # استجابات AsyncClient تصل داخل حلقة الأحداث؛ الكتابة تتم في الخلفية
+            loop.run_in_executor(None, self.update, *values)
+        else:
+            self.update(*values)
+
+    def get_status(self, username: str) -> List[Dict]:
+        """حالة الحدود المعروفة لحساب"""
+        now = time.time()
+        return [bucket for bucket in self.backend.get_all(username) if bucket["reset_at"] > now]
+
+    def get_headroom(self, username: str, endpoint: str) -> Optional[float]:
+        """نسبة الطلبات المتبقية في النافذة الحالية، أو None إذا لم تكن معروفة"""
+        try:
+            buckets = self.get_status(username)
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable: {e}")
+            return None
+        for bucket in buckets:
+            if bucket["endpoint"] == endpoint and bucket["limit"] > 0:
+                return bucket["remaining"] / bucket["limit"]
+        return None
+
+class RateLimitScheduler:
+    """انتظار إعادة تعيين الحد بدلاً من الرفض، بترتيب FIFO لكل حساب ومسارات أولوية"""
+
+    # هامش بعد موعد إعادة التعيين لتفادي فروق الساعة مع X
+    RESET_MARGIN_SECONDS = 0.5
+
+    def __init__(self, tracker: RateLimitTracker):
+        self.tracker = tracker
+        self._queues: Dict[str, list] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._seq = itertools.count()
+
+    def _has_waiters(self, username: str, endpoint: str) -> bool:
+        return any(
+            entry[2] == endpoint and not entry[3].done()
+            for entry in self._queues.get(username, [])
+        )
+
+    def _schedule(self, username: str, wake_at: float):
+        """جدولة توزيع الأماكن على المنتظرين عند إعادة تعيين الحد"""
+        loop = asyncio.get_running_loop()
+        delay = max(wake_at - time.time(), 0) + self.RESET_MARGIN_SECONDS
+        handle = self._timers.get(username)
+        if handle is not None:
+            if handle.when() <= loop.time() + delay:
+                return
+            handle.cancel()
+        self._timers[username] = loop.call_later(delay, self._start_dispatch, username)
+
+    def _start_dispatch(self, username: str):
+        self._timers.pop(username, None)
+        asyncio.ensure_future(self._dispatch(username))
+
+    async def _dispatch(self, username: str):
+        """منح الحدود المتاحة للمنتظرين حسب الأولوية ثم ترتيب الوصول"""
+        lock = self._locks.setdefault(username, asyncio.Lock())
+        async with lock:
+            blocked: Dict[str, float] = {}
+            for entry in sorted(self._queues.get(username, [])):
+                endpoint, future = entry[2], entry[3]
+                if future.done() or endpoint in blocked:
+                    continue
+                reset_at = await self.tracker.run(self.tracker.try_acquire, username, endpoint)
+                if reset_at is not None:
+                    blocked[endpoint] = reset_at
+                elif not future.done():
+                    future.set_result(None)
+
+            # قد يُضاف منتظرون جدد أثناء الحجز؛ هؤلاء جدولوا توزيعهم بأنفسهم
+            waiting = [entry for entry in self._queues.get(username, []) if not entry[3].done()]
+            if waiting:
+                heapq.heapify(waiting)
+                self._queues[username] = waiting
+                if blocked:
+                    self._schedule(username, min(blocked.values()))
+            else:
+                self._queues.pop(username, None)
+
+    async def acquire(self, username: str, endpoint: str, priority: int = PRIORITY_NORMAL,
+                      max_wait: Optional[float] = None):
+        """حجز طلب، مع الانتظار حتى max_wait ثانية إذا كان الحد مستنفداً
+
+        Raises:
+            RateLimitExceeded: إذا لم يتوفر الحد خلال مدة الانتظار
+        """
+        if max_wait is None:
+            max_wait = config.RATE_LIMIT_MAX_WAIT_SECONDS if config.RATE_LIMIT_MODE == "wait" else 0
+
+        # لا نتجاوز من ينتظر قبلنا على نفس نقطة النهاية
+        if not self._has_waiters(username, endpoint):
+            reset_at = await self.tracker.run(self.tracker.try_acquire, username, endpoint)
+            if reset_at is None:
+                return
+        else:
+            reset_at = await self.tracker.run(self.tracker.get_reset_at, username, endpoint)
+
+        if max_wait <= 0 or reset_at - time.time() > max_wait:
+            raise RateLimitExceeded(username, endpoint, reset_at)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queues.setdefault(username, []), (priority, next(self._seq), endpoint, future))
+        self._schedule(username, reset_at)
+        try:
+            await asyncio.wait_for(future, timeout=max_wait)
+        except asyncio.TimeoutError:
+            raise RateLimitExceeded(
+                username, endpoint, await self.tracker.run(self.tracker.get_reset_at, username, endpoint)
+            )
+
+# إنشاء متتبع حدود الطلبات العام
+rate_limiter = RateLimitTracker(create_rate_limit_backend())
+rate_limit_scheduler = RateLimitScheduler(rate_limiter)
+
+# تحديث الحدود من كل استجابة عبر مجموعة الاتصالات المشتركة
+add_response_listener(rate_limiter.record_response)
@@ -0,0 +1,162 @@
+import asyncio
+import random
+import threading
+import time
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+import requests
+import tweepy
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiohttp
+    _ASYNC_TRANSIENT_ERRORS = (aiohttp.ClientConnectionError,)
+    _ASYNC_CONNECT_ERRORS = (aiohttp.ClientConnectorError,)
+except ImportError:
+    _ASYNC_TRANSIENT_ERRORS = ()
+    _ASYNC_CONNECT_ERRORS = ()
+
+# أخطاء الشبكة المؤقتة
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError) + _ASYNC_TRANSIENT_ERRORS
+
+# أخطاء تحدث قبل إرسال الطلب، فإعادة المحاولة آمنة حتى للكتابة
+CONNECT_ERRORS = (requests.ConnectTimeout,) + _ASYNC_CONNECT_ERRORS
+
+class RetryBudget:
+    """ميزانية عامة تحدّ إعادة المحاولات بنسبة من الطلبات حتى لا تضخّم الأعطال"""
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def record_request(self):
+        """كل طلب أصلي يضيف جزءاً من محاولة"""
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """سحب محاولة من الميزانية إن توفرت"""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.retries += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "budget_exhausted": self.exhausted,
+                "tokens": round(self._tokens, 2)
+            }
+
+def unwrap_error(exc: Exception) -> Exception:
+    """tweepy.API يغلّف أخطاء الشبكة في TweepyException عامة؛ نعيد خطأ requests الأصلي"""
+    if type(exc) is tweepy.TweepyException and exc.__context__ is not None:
+        return exc.__context__
+    return exc
+
+def _response_status(exc: Exception) -> Optional[int]:
+    """رمز الحالة من استثناء tweepy (requests أو aiohttp)"""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    return getattr(response, "status_code", None) or getattr(response, "status", None)
+
+def get_retry_after(exc: Exception) -> Optional[float]:
+    """المدة التي تطلبها X قبل إعادة المحاولة من Retry-After أو x-rate-limit-reset"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    reset = headers.get("x-rate-limit-reset")
+    if reset is not None:
+        try:
+            return max(float(reset) - time.time(), 0.0)
+        except ValueError:
+            pass
+    return None
+
+class RetryPolicy:
+    """سياسة إعادة المحاولة بتراجع أسي وتذبذب غير مترابط (decorrelated jitter)"""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, budget: RetryBudget):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def is_retryable(self, exc: Exception, idempotent: bool) -> bool:
+        """هل يمكن إعادة الطلب بأمان"""
+        exc = unwrap_error(exc)
+        if isinstance(exc, tweepy.TooManyRequests):
+            # X رفضت الطلب دون تنفيذه
+            return True
+        if isinstance(exc, CONNECT_ERRORS):
+            return True
+        if not idempotent:
+            return False
+        if isinstance(exc, tweepy.TwitterServerError):
+            return True
+        if isinstance(exc, tweepy.HTTPException):
+            return _response_status(exc) in (408, 429, 500, 502, 503, 504)
+        return isinstance(exc, TRANSIENT_ERRORS)
+
+    def next_delay(self, previous_delay: float) -> float:
+        """التأخير التالي: min(max_delay, random(base, previous * 3))"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(previous_delay, self.base_delay) * 3))
+
+    async def run(self, attempt: Callable[[], Awaitable], idempotent: bool = True, description: str = ""):
+        """تنفيذ attempt مع إعادة المحاولة عند الأخطاء المؤقتة"""
+        self.budget.record_request()
+        delay = self.base_delay
+        for attempt_number in range(1, self.max_attempts + 1):
+            try:
+                return await attempt()
+            except Exception as exc:
+                if attempt_number >= self.max_attempts or not self.is_retryable(exc, idempotent):
+                    raise
+
+                delay = self.next_delay(delay)
+                retry_after = get_retry_after(exc)
+                if retry_after is not None:
+                    if retry_after > self.max_delay:
+                        # الانتظار أطول من المسموح؛ نترك الخطأ للمستدعي
+                        raise
+                    delay = max(delay, retry_after)
+
+                if not self.budget.try_withdraw():
+                    logger.warning(f"Retry budget exhausted; not retrying {description}")
+                    raise
+
+                logger.info(f"Retrying {description} in {delay:.2f}s after: {exc}")
+                await asyncio.sleep(delay)
+
+# إنشاء سياسة إعادة المحاولة العامة
+retry_budget = RetryBudget(
+    ratio=config.RETRY_BUDGET_RATIO,
+    max_tokens=config.RETRY_BUDGET_MAX_TOKENS
+)
+retry_policy = RetryPolicy(
+    max_attempts=config.RETRY_MAX_ATTEMPTS,
+    base_delay=config.RETRY_BASE_DELAY_SECONDS,
+    max_delay=config.RETRY_MAX_DELAY_SECONDS,
+    budget=retry_budget
+)
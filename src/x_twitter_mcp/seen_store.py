@@ -0,0 +1,142 @@
+import asyncio
+import atexit
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional, Set
+from .config import config
+from .database import db_manager
+
+# بداية توقيت معرّفات Snowflake في X (بالمللي ثانية)
+TWITTER_EPOCH_MS = 1288834974657
+
+def snowflake_to_timestamp(tweet_id: int) -> float:
+    """وقت إنشاء التغريدة من معرّفها"""
+    return ((tweet_id >> 22) + TWITTER_EPOCH_MS) / 1000
+
+def timestamp_to_snowflake(timestamp: float) -> int:
+    """أصغر معرّف Snowflake يمكن إنشاؤه في هذا الوقت"""
+    return max(int(timestamp * 1000) - TWITTER_EPOCH_MS, 0) << 22
+
+class SeenTweetStore:
+    """مجموعة مضغوطة لمعرّفات التغريدات المرئية لكل حساب (array('Q') مرتبة)، محدودة بالعمر والعدد"""
+
+    def __init__(self, max_age: float, max_entries: int, flush_delay: float):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.flush_delay = flush_delay
+        self._sets: Dict[str, array] = {}
+        # الحسابات التي تغيّرت مجموعتها منذ آخر حفظ
+        self._dirty: Set[str] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._lock = threading.Lock()
+
+    async def load(self, username: str):
+        """تحميل مجموعة الحساب من قاعدة البيانات خارج حلقة الأحداث قبل أول استخدام"""
+        if username in self._sets:
+            return
+        ids = array("Q")
+        data = await asyncio.to_thread(db_manager.get_seen_tweets, username)
+        if data:
+            ids.frombytes(data)
+        with self._lock:
+            self._sets.setdefault(username, ids)
+
+    def _load(self, username: str) -> array:
+        # تُحمَّل مسبقاً عبر load()؛ حساب لم يُحمَّل يبدأ فارغاً ويُدمج مع المحفوظ عند الحفظ
+        return self._sets.setdefault(username, array("Q"))
+
+    @staticmethod
+    def _insert(ids: array, new_ids: Iterable[int]):
+        """إدراج معرّفات مرتبة في المصفوفة المرتبة نفسها مع تجاهل المكرر"""
+        index = 0
+        for tweet_id in new_ids:
+            index = bisect_left(ids, tweet_id, index)
+            if index == len(ids) or ids[index] != tweet_id:
+                ids.insert(index, tweet_id)
+
+    def _prune(self, ids: array):
+        """حذف المعرّفات الأقدم من max_age ثم الأقدم فوق max_entries"""
+        # المعرّفات مرتبة زمنياً، فالأقدم في البداية
+        start = bisect_left(ids, timestamp_to_snowflake(time.time() - self.max_age))
+        start = max(start, len(ids) - self.max_entries)
+        if start > 0:
+            del ids[:start]
+
+    def contains(self, username: str, tweet_id) -> bool:
+        """هل رأى الحساب هذه التغريدة"""
+        tweet_id = int(tweet_id)
+        with self._lock:
+            ids = self._load(username)
+            index = bisect_left(ids, tweet_id)
+            return index < len(ids) and ids[index] == tweet_id
+
+    def add(self, username: str, tweet_ids: Iterable):
+        """تسجيل تغريدات كمرئية؛ الحفظ في قاعدة البيانات مؤجل ومجمّع"""
+        new_ids = sorted({int(tweet_id) for tweet_id in tweet_ids})
+        if not new_ids:
+            return
+        with self._lock:
+            ids = self._load(username)
+            # المعرّفات الجديدة غالباً في نهاية المصفوفة
+            self._insert(ids, new_ids)
+            self._prune(ids)
+            self._dirty.add(username)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        """جدولة حفظ واحد بعد flush_delay لكل التغييرات المتراكمة"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        # الكتابة في قاعدة البيانات تتم خارج حلقة الأحداث
+        asyncio.ensure_future(asyncio.to_thread(self.flush))
+
+    def _merge(self, stored: Optional[bytes], data: bytes) -> bytes:
+        """اتحاد المجموعة المحفوظة (من كل العمليات) مع مجموعة هذه العملية"""
+        ids = array("Q")
+        ids.frombytes(data)
+        if stored:
+            other = array("Q")
+            other.frombytes(stored)
+            ids = array("Q", sorted(set(ids).union(other)))
+        self._prune(ids)
+        return ids.tobytes()
+
+    def flush(self):
+        """دمج المجموعات المتغيرة مع المحفوظة وحفظها، ثم أخذ معرّفات العمليات الأخرى"""
+        with self._lock:
+            pending = {username: self._sets[username].tobytes() for username in self._dirty}
+            self._dirty.clear()
+        for username, data in pending.items():
+            merged = db_manager.merge_seen_tweets(username, lambda stored: self._merge(stored, data))
+            if merged is None:
+                continue
+            stored, own = array("Q"), array("Q")
+            stored.frombytes(merged)
+            own.frombytes(data)
+            # الفرق يُحسب خارج القفل؛ عادة قليل من المعرّفات
+            missing = sorted(set(stored).difference(own))
+            if missing:
+                with self._lock:
+                    ids = self._load(username)
+                    self._insert(ids, missing)
+                    self._prune(ids)
+
+# إنشاء مخزن التغريدات المرئية العام
+seen_store = SeenTweetStore(
+    max_age=config.SEEN_TWEETS_MAX_AGE_SECONDS,
+    max_entries=config.SEEN_TWEETS_MAX_ENTRIES,
+    flush_delay=config.SEEN_TWEETS_FLUSH_SECONDS
+)
+
+# حفظ ما لم يُحفظ بعد عند إيقاف الخادم
+atexit.register(seen_store.flush)
@@ -1,12 +1,32 @@
 import asyncio
+import itertools
 import logging
+import os
+import re
+import time
 import warnings
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 import tweepy
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from .database import db_manager
+from typing import List, Dict, Optional, Union
+from .config import config
+from .database import db_manager, TwitterAccount
+from .client_pool import client_pool
+from .credentials_cache import credentials_cache
+from .executor import twitter_executor, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BULK
+from .rate_limiter import rate_limiter, rate_limit_scheduler, current_request, RateLimitExceeded
+from .retry import retry_policy
+from .circuit_breaker import circuit_breakers, endpoint_family, is_upstream_failure
+from .cache import user_cache, trends_cache
+from .batching import create_batch_loader
+from .singleflight import single_flight, make_key
+from .feed_sync import feed_sync
+from .seen_store import seen_store
+from .prefetch import page_prefetcher
+from .crawler import graph_crawler
+from .graph import follow_graph_cache, intersect_sorted
+from .media_upload import chunked_uploader, needs_chunked_upload
+from .media_cache import media_cache
+from .image_optimizer import image_optimizer
 from .auth_api import start_auth_server
 
 logging.basicConfig(level=logging.INFO)
@@ -21,63 +41,260 @@ server = FastMCP(name="TwitterMCPServer")
 # بدء تشغيل خادم المصادقة
 auth_server_thread = start_auth_server(host="127.0.0.1", port=8000)
 
-def initialize_twitter_clients(username: str) -> tuple[tweepy.Client, tweepy.API]:
-    """Initialize Twitter API clients using stored credentials."""
+def _get_active_account(username: str) -> TwitterAccount:
+    """Load the stored account and reject credentials known to be invalid."""
     
     # الحصول على الحساب من قاعدة البيانات
     account = db_manager.get_account(username)
     if not account:
         raise ValueError(f"الحساب '{username}' غير موجود أو غير نشط. يرجى إضافته أولاً عبر واجهة API المصادقة.")
     
-    # التحقق من صحة المفاتيح
-    if not db_manager.test_credentials(username):
+    # التحقق من صحة المفاتيح من الذاكرة المؤقتة بدلاً من طلب get_me في كل مرة
+    if credentials_cache.is_invalid(username):
         raise ValueError(f"مفاتيح المصادقة للحساب '{username}' غير صحيحة. يرجى تحديثها.")
     
-    # Initialize v2 API client
-    twitter_client = tweepy.Client(
-        consumer_key=account.api_key,
-        consumer_secret=account.api_secret,
-        access_token=account.access_token,
-        access_token_secret=account.access_token_secret,
-        bearer_token=account.bearer_token
-    )
-
-    # Initialize v1.1 API for media uploads and other unsupported v2 endpoints
-    auth = tweepy.OAuth1UserHandler(
-        consumer_key=account.api_key,
-        consumer_secret=account.api_secret,
-        access_token=account.access_token,
-        access_token_secret=account.access_token_secret
-    )
-    twitter_v1_api = tweepy.API(auth)
+    return account
 
+def initialize_twitter_clients(username: str) -> tuple[tweepy.Client, tweepy.API]:
+    """Return pooled Twitter API clients for the stored account credentials."""
+    account = _get_active_account(username)
+    
+    # إعادة استخدام العملاء المحفوظين لهذا الحساب
+    twitter_client, twitter_v1_api = client_pool.get_clients(account)
+    credentials_cache.ensure_fresh(username, twitter_client)
     return twitter_client, twitter_v1_api
 
-# Rate limiting configuration
-RATE_LIMITS = {
-    "tweet_actions": {"limit": 300, "window": timedelta(minutes=15)},
-    "dm_actions": {"limit": 1000, "window": timedelta(minutes=15)},
-    "follow_actions": {"limit": 400, "window": timedelta(hours=24)},
-    "like_actions": {"limit": 1000, "window": timedelta(hours=24)}
+async def initialize_async_client(username: str):
+    """Return the pooled tweepy AsyncClient for the stored account credentials."""
+    # استعلام قاعدة البيانات متزامن، فيُنفَّذ خارج حلقة الأحداث
+    account = await asyncio.to_thread(_get_active_account, username)
+    
+    # التحقق من المفاتيح في الخلفية يستخدم العميل المتزامن
+    twitter_client, _ = client_pool.get_clients(account)
+    credentials_cache.ensure_fresh(username, twitter_client)
+    return client_pool.get_async_client(account)
+
+def _call_twitter_sync(username: str, method: str, api: str, args: tuple, kwargs: dict):
+    """Run a tweepy method synchronously on the account's pooled client."""
+    client, v1_api = initialize_twitter_clients(username)
+    target = client if api == "v2" else v1_api
+    try:
+        return getattr(target, method)(*args, **kwargs)
+    except tweepy.Unauthorized:
+        credentials_cache.mark_invalid(username)
+        raise
+
+async def _call_twitter_async(username: str, method: str, args: tuple, kwargs: dict):
+    """Run a v2 method on the account's pooled tweepy AsyncClient."""
+    async_client = await initialize_async_client(username)
+    try:
+        return await getattr(async_client, method)(*args, **kwargs)
+    except tweepy.Unauthorized:
+        credentials_cache.mark_invalid(username)
+        raise
+
+# Write methods served ahead of reads when an account is saturated
+INTERACTIVE_METHODS = {
+    "create_tweet", "delete_tweet", "like", "unlike",
+    "bookmark", "remove_bookmark", "media_upload"
 }
 
-# In-memory rate limit tracking (use Redis in production)
-rate_limit_counters = defaultdict(lambda: {"count": 0, "reset_time": datetime.now()})
-
-def check_rate_limit(action_type: str) -> bool:
-    """Check if the action is within rate limits."""
-    config = RATE_LIMITS.get(action_type)
-    if not config:
-        return True  # No limit defined
-    counter = rate_limit_counters[action_type]
-    now = datetime.now()
-    if now >= counter["reset_time"]:
-        counter["count"] = 0
-        counter["reset_time"] = now + config["window"]
-    if counter["count"] >= config["limit"]:
-        return False
-    counter["count"] += 1
-    return True
+# Methods whose repetition has a visible side effect; retried only when X never processed them
+NON_IDEMPOTENT_METHODS = {"create_tweet"}
+
+# Read-only methods, safe to share between identical concurrent calls
+READ_METHOD_PREFIXES = ("get_", "search_")
+
+async def twitter_call(
+    username: str,
+    method: str,
+    /,
+    *args,
+    api: str = "v2",
+    priority: Optional[int] = None,
+    max_wait: Optional[float] = None,
+    timeout: Optional[float] = None,
+    **kwargs
+):
+    """Call a tweepy method on the account's pooled client without blocking the event loop.
+
+    With TWITTER_BACKEND=asyncio, v2 methods are served by tweepy's AsyncClient;
+    v1.1-only methods (media uploads, trends) always run on the thread pool.
+
+    Args:
+        username (str): Account whose credentials are used.
+        method (str): Name of the tweepy.Client (or tweepy.API) method.
+        api (str): "v2" for tweepy.Client, "v1" for tweepy.API.
+        priority (Optional[int]): Scheduling lane; defaults to interactive for writes and normal for reads.
+        max_wait (Optional[float]): Seconds to queue for an exhausted rate limit. Defaults to RATE_LIMIT_MAX_WAIT_SECONDS in "wait" mode, otherwise the call is rejected immediately.
+        timeout (Optional[float]): Seconds each attempt may take once it runs; a timeout counts as an upstream failure.
+
+    Identical concurrent read calls share one in-flight request (SINGLE_FLIGHT_ENABLED).
+    """
+    if priority is None:
+        priority = PRIORITY_INTERACTIVE if method in INTERACTIVE_METHODS else PRIORITY_NORMAL
+
+    breaker = circuit_breakers.get(endpoint_family(method, api)) if config.CIRCUIT_BREAKER_ENABLED else None
+
+    async def attempt():
+        # انتظار أو رفض الطلب محلياً إذا كان حد نقطة النهاية لهذا الحساب مستنفداً
+        await rate_limit_scheduler.acquire(username, method, priority=priority, max_wait=max_wait)
+        # الفشل السريع إذا كانت مجموعة نقاط النهاية معطلة
+        if breaker is not None:
+            breaker.before_call()
+        token = current_request.set((username, method))
+        started = None
+        succeeded = None
+
+        # يبدأ التوقيت بعد الحصول على مكان في المنفّذ، فلا يُحسب الانتظار المحلي بطئاً من X
+        def call_sync():
+            nonlocal started
+            started = time.monotonic()
+            return _call_twitter_sync(username, method, api, args, kwargs)
+
+        def call_async():
+            nonlocal started
+            started = time.monotonic()
+            return _call_twitter_async(username, method, args, kwargs)
+
+        try:
+            if api == "v2" and config.TWITTER_BACKEND == "asyncio":
+                result = await twitter_executor.run_async(username, call_async, priority=priority, timeout=timeout)
+            else:
+                result = await twitter_executor.run(username, call_sync, priority=priority, timeout=timeout)
+            succeeded = True
+            return result
+        except Exception as exc:
+            if is_upstream_failure(exc):
+                succeeded = False
+            elif isinstance(exc, tweepy.HTTPException):
+                # X استجابت بخطأ في الطلب، فالخدمة نفسها سليمة
+                succeeded = True
+            raise
+        finally:
+            current_request.reset(token)
+            if breaker is not None:
+                if succeeded is None or started is None:
+                    breaker.release()
+                else:
+                    breaker.record(succeeded, time.monotonic() - started)
+
+    def run():
+        return retry_policy.run(
+            attempt,
+            idempotent=method not in NON_IDEMPOTENT_METHODS,
+            description=f"{method} for '{username}'"
+        )
+
+    # الطلبات المتطابقة المتزامنة للقراءة تشترك في طلب واحد
+    if config.SINGLE_FLIGHT_ENABLED and method.startswith(READ_METHOD_PREFIXES):
+        return await single_flight.do(make_key(username, method, (api,) + args, kwargs), run)
+    return await run()
+
+async def fetch_page(
+    username: str,
+    method: str,
+    cursor: Optional[str] = None,
+    page_param: str = "pagination_token",
+    **kwargs
+):
+    """Fetch one page of a cursor-based endpoint, using a prefetched copy when available.
+
+    With PREFETCH_ENABLED, the page after the returned one is fetched in the background
+    (bulk priority, never waiting on rate limits) when the endpoint has enough headroom.
+    """
+    key = make_key(username, method, (page_param, cursor), kwargs)
+    task = page_prefetcher.take(key) if config.PREFETCH_ENABLED else None
+    page = None
+    if task is not None:
+        try:
+            page = await task
+        except Exception as e:
+            logger.info(f"Prefetched page of {method} for '{username}' failed, fetching again: {e}")
+    if page is None:
+        page = await twitter_call(username, method, **{page_param: cursor}, **kwargs)
+
+    next_token = (page.meta or {}).get("next_token") if config.PREFETCH_ENABLED else None
+    if next_token:
+        await page_prefetcher.schedule(
+            make_key(username, method, (page_param, next_token), kwargs),
+            username,
+            method,
+            lambda: twitter_call(
+                username, method, priority=PRIORITY_BULK, max_wait=0, **{page_param: next_token}, **kwargs
+            )
+        )
+    return page
+
+# Smallest max_results each paginated endpoint accepts
+MIN_PAGE_SIZES = {
+    "get_users_followers": 1,
+    "get_users_following": 1,
+    "get_users_tweets": 5,
+    "get_users_mentions": 5,
+    "search_recent_tweets": 10
+}
+
+async def paginate(
+    username: str,
+    method: str,
+    max_items: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    page_param: str = "pagination_token",
+    ctx: Optional[Context] = None,
+    **kwargs
+) -> Dict:
+    """Follow next_token pages until max_items are collected, the deadline passes or the rate budget runs out.
+
+    Each page goes through twitter_call (rather than tweepy.Paginator) so it is rate limited,
+    retried and circuit-broken like any other request. Progress is reported after every page.
+
+    The last page is shrunk to the items still needed, but not below the endpoint's minimum
+    page size. If that page overshoots max_items while a cursor remains, it is returned whole
+    so resuming from next_cursor skips nothing.
+
+    Returns:
+        {"items": [...], "next_cursor": token to resume from or None, "complete": bool, "stopped": reason}
+    """
+    max_items = min(max_items, config.PAGINATION_MAX_ITEMS)
+    min_page_size = MIN_PAGE_SIZES.get(method, 10)
+    deadline = time.monotonic() + config.PAGINATION_DEADLINE_SECONDS
+    items = []
+    stopped = "exhausted"
+    while True:
+        try:
+            max_results = min(page_size, max(max_items - len(items), min_page_size))
+            # Not fetch_page: the prefetched page after the last one would be wasted, and the
+            # shrunk last page would miss the prefetch key and be fetched twice
+            page = await twitter_call(username, method, **{page_param: cursor}, max_results=max_results, **kwargs)
+        except (RateLimitExceeded, tweepy.TooManyRequests) as e:
+            logger.info(f"Stopping pagination of {method} for '{username}': {e}")
+            stopped = "rate_limited"
+            break
+        items.extend(item.data for item in page.data or [])
+        cursor = (page.meta or {}).get("next_token")
+        if ctx is not None:
+            await ctx.report_progress(min(len(items), max_items), max_items)
+        if not cursor:
+            break
+        if len(items) >= max_items:
+            stopped = "max_items"
+            break
+        if time.monotonic() >= deadline:
+            stopped = "deadline"
+            break
+
+    if len(items) > max_items and cursor is None:
+        # Nothing to resume from, so the overshoot of the last page can be cut
+        items = items[:max_items]
+        stopped = "max_items"
+    return {
+        "items": items,
+        "next_cursor": cursor,
+        "complete": stopped == "exhausted",
+        "stopped": stopped
+    }
 
 # Account Management Tools
 @server.tool(name="add_twitter_account", description="Add a new Twitter account to the database")
@@ -114,7 +331,7 @@ async def add_twitter_account(
         
         if success:
             # اختبار المفاتيح
-            is_valid = db_manager.test_credentials(username)
+            is_valid = await twitter_executor.run(username, db_manager.test_credentials, username)
             return {
                 "success": True,
                 "message": f"تم إضافة الحساب '{username}' بنجاح",
@@ -149,7 +366,11 @@ async def test_twitter_account(username: str) -> Dict:
         username (str): Twitter username to test
     """
     try:
-        is_valid = db_manager.test_credentials(username)
+        is_valid = await twitter_executor.run(username, db_manager.test_credentials, username)
+        if is_valid:
+            credentials_cache.mark_valid(username)
+        else:
+            credentials_cache.invalidate(username)
         return {
             "username": username,
             "credentials_valid": is_valid,
@@ -187,7 +408,98 @@ async def remove_twitter_account(username: str) -> Dict:
             "message": f"خطأ: {str(e)}"
         }
 
+@server.tool(name="get_rate_limit_status", description="Show the known X rate limits for a Twitter account")
+async def get_rate_limit_status(username: str) -> List[Dict]:
+    """Lists the per-endpoint rate limits learned from X's x-rate-limit response headers.
+
+    Args:
+        username (str): Your Twitter username (stored in database)
+    """
+    return await rate_limiter.run(rate_limiter.get_status, username)
+
 # User Management Tools
+USER_FIELDS = ["id", "name", "username", "profile_image_url", "description", "protected"]
+TWEET_FIELDS = ["id", "text", "created_at", "author_id"]
+
+async def _fetch_users(username: str, user_ids: List[str]) -> Dict:
+    users = await twitter_call(username, "get_users", ids=user_ids, user_fields=USER_FIELDS)
+    return {str(user.id): user for user in users.data or []}
+
+async def _fetch_tweets(username: str, tweet_ids: List[str]) -> Dict:
+    tweets = await twitter_call(username, "get_tweets", ids=tweet_ids, tweet_fields=TWEET_FIELDS)
+    return {str(tweet.id): tweet for tweet in tweets.data or []}
+
+# X rejects a whole get_users/get_tweets request with 400 when any ID is malformed
+user_loader = create_batch_loader("users", _fetch_users, split_errors=(tweepy.BadRequest,))
+tweet_loader = create_batch_loader("tweets", _fetch_tweets, split_errors=(tweepy.BadRequest,))
+
+# X rejects a whole lookup request with 400 when any key is malformed
+BULK_KEY_PATTERNS = {
+    "ids": re.compile(r"\d{1,19}"),
+    "usernames": re.compile(r"[A-Za-z0-9_]{1,15}")
+}
+
+async def bulk_lookup(username: str, keys: List[str], method: str, param: str, match_field: str, **kwargs) -> List[Dict]:
+    """Resolve many IDs or handles in 100-item chunks, returning one result per key in input order.
+
+    Malformed keys are reported as per-key errors without being sent, so they cannot fail
+    the other keys of their chunk.
+    """
+    found: Dict[str, Dict] = {}
+    errors: Dict[str, str] = {}
+    pattern = BULK_KEY_PATTERNS.get(param)
+    valid = []
+    for key in keys:
+        if pattern is not None and not pattern.fullmatch(key):
+            errors[key.lower()] = f"Invalid value for {param}: {key!r}"
+        else:
+            valid.append(key)
+
+    chunks = [valid[i:i + 100] for i in range(0, len(valid), 100)]
+    responses = await asyncio.gather(
+        *(twitter_call(username, method, priority=PRIORITY_BULK, **{param: chunk}, **kwargs) for chunk in chunks),
+        return_exceptions=True
+    )
+
+    for chunk, response in zip(chunks, responses):
+        if isinstance(response, Exception):
+            for key in chunk:
+                errors[key.lower()] = str(response)
+            continue
+        for item in response.data or []:
+            found[str(getattr(item, match_field)).lower()] = item.data
+        for error in response.errors or []:
+            value = str(error.get("value") or error.get("resource_id") or "").lower()
+            errors[value] = error.get("detail") or error.get("title") or "Not found"
+
+    results = []
+    for key in keys:
+        item = found.get(key.lower())
+        error = None if item is not None else errors.get(key.lower(), "Not found")
+        results.append({"key": key, "data": item, "error": error})
+    return results
+
+async def lookup_user(username: str, user_id: Optional[str] = None, screen_name: Optional[str] = None):
+    """Fetch a single user by ID or screen name, served from the user cache when possible."""
+    if config.USER_CACHE_ENABLED:
+        if user_id is not None:
+            cached = user_cache.get_by_id(user_id, username)
+        else:
+            cached = user_cache.get_by_screen_name(screen_name, username)
+        if cached is not None:
+            return cached
+
+    # Only well-formed IDs are coalesced, so a bad one fails its own call alone
+    if user_id is not None and config.BATCH_ENABLED and str(user_id).isdigit():
+        user = await user_loader.load(username, str(user_id))
+    elif user_id is not None:
+        user = (await twitter_call(username, "get_user", id=user_id, user_fields=USER_FIELDS)).data
+    else:
+        user = (await twitter_call(username, "get_user", username=screen_name, user_fields=USER_FIELDS)).data
+    if config.USER_CACHE_ENABLED:
+        user_cache.put(user, username)
+    return user
+
 @server.tool(name="get_user_profile", description="Get detailed profile information for a user")
 async def get_user_profile(user_id: str, username: str) -> Dict:
     """Fetches user profile by user ID.
@@ -196,9 +508,7 @@ async def get_user_profile(user_id: str, username: str) -> Dict:
         user_id (str): The ID of the user to look up.
         username (str): Your Twitter username (stored in database)
     """
-    client, _ = initialize_twitter_clients(username)
-    user = client.get_user(id=user_id, user_fields=["id", "name", "username", "profile_image_url", "description"])
-    return user.data
+    return await lookup_user(username, user_id=user_id)
 
 @server.tool(name="get_user_by_screen_name", description="Fetches a user by screen name")
 async def get_user_by_screen_name(screen_name: str, username: str) -> Dict:
@@ -208,9 +518,7 @@ async def get_user_by_screen_name(screen_name: str, username: str) -> Dict:
         screen_name (str): The screen name/username of the user.
         username (str): Your Twitter username (stored in database)
     """
-    client, _ = initialize_twitter_clients(username)
-    user = client.get_user(username=screen_name, user_fields=["id", "name", "username", "profile_image_url", "description"])
-    return user.data
+    return await lookup_user(username, screen_name=screen_name)
 
 @server.tool(name="get_user_by_id", description="Fetches a user by ID")
 async def get_user_by_id(user_id: str, username: str) -> Dict:
@@ -220,17 +528,63 @@ async def get_user_by_id(user_id: str, username: str) -> Dict:
         user_id (str): The ID of the user to look up.
         username (str): Your Twitter username (stored in database)
     """
-    client, _ = initialize_twitter_clients(username)
-    user = client.get_user(id=user_id, user_fields=["id", "name", "username", "profile_image_url", "description"])
-    return user.data
+    return await lookup_user(username, user_id=user_id)
+
+@server.tool(name="get_users_bulk", description="Look up many users by ID or screen name in one call")
+async def get_users_bulk(
+    username: str,
+    user_ids: Optional[List[str]] = None,
+    screen_names: Optional[List[str]] = None
+) -> List[Dict]:
+    """Looks up many users, chunked into 100-item requests that run concurrently.
+
+    Args:
+        username (str): Your Twitter username (stored in database)
+        user_ids (Optional[List[str]]): User IDs to look up.
+        screen_names (Optional[List[str]]): Screen names to look up (used when user_ids is not given).
+
+    Returns:
+        One {"key", "data", "error"} entry per requested item, in input order.
+    """
+    if user_ids:
+        keys = [str(user_id) for user_id in user_ids]
+        lookup = {"param": "ids", "match_field": "id"}
+    elif screen_names:
+        keys = [name.lstrip("@") for name in screen_names]
+        lookup = {"param": "usernames", "match_field": "username"}
+    else:
+        raise ValueError("Either user_ids or screen_names is required")
+
+    # الملفات المحفوظة لا تحتاج طلباً
+    cached = {}
+    if config.USER_CACHE_ENABLED:
+        for key in keys:
+            user = user_cache.get_by_id(key, username) if user_ids else user_cache.get_by_screen_name(key, username)
+            if user is not None:
+                cached[key] = user
+    missing = list(dict.fromkeys(key for key in keys if key not in cached))
+
+    fetched = {}
+    if missing:
+        for result in await bulk_lookup(username, missing, "get_users", user_fields=USER_FIELDS, **lookup):
+            fetched[result["key"]] = result
+            if config.USER_CACHE_ENABLED and result["data"] is not None:
+                user_cache.put(tweepy.User(result["data"]), username)
+
+    return [
+        {"key": key, "data": cached[key].data, "error": None} if key in cached else fetched[key]
+        for key in keys
+    ]
 
 @server.tool(name="get_user_followers", description="Retrieves a list of followers for a given user")
 async def get_user_followers(
     user_id: str,
     username: str,
     count: Optional[int] = 100,
-    cursor: Optional[str] = None
-) -> List[Dict]:
+    cursor: Optional[str] = None,
+    max_items: Optional[int] = None,
+    ctx: Optional[Context] = None
+) -> Union[List[Dict], Dict]:
     """Retrieves a list of followers for a given user.
 
     Args:
@@ -238,11 +592,11 @@ async def get_user_followers(
         username (str): Your Twitter username (stored in database)
         count (Optional[int]): The number of followers to retrieve per page. Default is 100. Max is 100 for V2 API.
         cursor (Optional[str]): A pagination token for fetching the next set of results.
+        max_items (Optional[int]): Fetch pages until this many users are collected. Returns {"items", "next_cursor", "complete", "stopped"}; pass next_cursor back as cursor to resume.
     """
-    if not check_rate_limit("follow_actions"):
-        raise Exception("Follow action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    followers = client.get_users_followers(id=user_id, max_results=count, pagination_token=cursor, user_fields=["id", "name", "username"])
+    if max_items:
+        return await paginate(username, "get_users_followers", max_items, 1000, cursor, ctx=ctx, id=user_id, user_fields=["id", "name", "username"])
+    followers = await fetch_page(username, "get_users_followers", cursor, id=user_id, max_results=count, user_fields=["id", "name", "username"])
     return [user.data for user in followers.data]
 
 @server.tool(name="get_user_following", description="Retrieves users the given user is following")
@@ -250,8 +604,10 @@ async def get_user_following(
     user_id: str,
     username: str,
     count: Optional[int] = 100,
-    cursor: Optional[str] = None
-) -> List[Dict]:
+    cursor: Optional[str] = None,
+    max_items: Optional[int] = None,
+    ctx: Optional[Context] = None
+) -> Union[List[Dict], Dict]:
     """Retrieves a list of users whom the given user is following.
 
     Args:
@@ -259,34 +615,111 @@ async def get_user_following(
         username (str): Your Twitter username (stored in database)
         count (Optional[int]): The number of users to retrieve per page. Default is 100. Max is 100 for V2 API.
         cursor (Optional[str]): A pagination token for fetching the next set of results.
+        max_items (Optional[int]): Fetch pages until this many users are collected. Returns {"items", "next_cursor", "complete", "stopped"}; pass next_cursor back as cursor to resume.
     """
-    if not check_rate_limit("follow_actions"):
-        raise Exception("Follow action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    following = client.get_users_following(id=user_id, max_results=count, pagination_token=cursor, user_fields=["id", "name", "username"])
+    if max_items:
+        return await paginate(username, "get_users_following", max_items, 1000, cursor, ctx=ctx, id=user_id, user_fields=["id", "name", "username"])
+    following = await fetch_page(username, "get_users_following", cursor, id=user_id, max_results=count, user_fields=["id", "name", "username"])
     return [user.data for user in following.data]
 
-@server.tool(name="get_user_followers_you_know", description="Retrieves a list of common followers (simulated)")
+@server.tool(name="start_graph_crawl", description="Crawl a user's complete follower or following list to a file in the background")
+async def start_graph_crawl(
+    user_id: str,
+    username: str,
+    direction: Optional[str] = "followers",
+    output_format: Optional[str] = "ndjson"
+) -> Dict:
+    """Starts a background job that pages through the whole list, checkpointing after each page.
+
+    Args:
+        user_id (str): The user ID whose followers/following are crawled.
+        username (str): Your Twitter username (stored in database)
+        direction (Optional[str]): "followers" (default) or "following".
+        output_format (Optional[str]): "ndjson" (default) or "parquet" (requires pyarrow).
+    """
+    _get_active_account(username)
+    job = await graph_crawler.create_job(username, user_id, direction, output_format)
+    return await graph_crawler.start(job["job_id"], twitter_call)
+
+@server.tool(name="resume_graph_crawl", description="Resume an interrupted, failed or cancelled crawl from its last checkpoint")
+async def resume_graph_crawl(job_id: str) -> Dict:
+    """Resumes a crawl job from the last saved pagination token.
+
+    Args:
+        job_id (str): The crawl job ID returned by start_graph_crawl.
+    """
+    return await graph_crawler.start(job_id, twitter_call)
+
+@server.tool(name="cancel_graph_crawl", description="Stop a running crawl job")
+async def cancel_graph_crawl(job_id: str) -> Dict:
+    """Cancels a crawl job; it can be resumed later.
+
+    Args:
+        job_id (str): The crawl job ID returned by start_graph_crawl.
+    """
+    return await graph_crawler.cancel(job_id)
+
+@server.tool(name="get_graph_crawl_status", description="Show progress of crawl jobs")
+async def get_graph_crawl_status(job_id: Optional[str] = None, username: Optional[str] = None) -> List[Dict]:
+    """Shows status, records written and output path of crawl jobs.
+
+    Args:
+        job_id (Optional[str]): A single job to report on. If omitted, all jobs are listed.
+        username (Optional[str]): Only list jobs of this account.
+    """
+    if job_id:
+        job = await graph_crawler.status(job_id)
+        return [job] if job else []
+    return await graph_crawler.list(username)
+
+async def get_own_user_id(username: str) -> str:
+    """The account's own user ID, from the credentials cache or get_me."""
+    status = credentials_cache.get(username)
+    if status is not None and status.user_id:
+        return status.user_id
+    me = await twitter_call(username, "get_me")
+    credentials_cache.mark_valid(username, str(me.data.id))
+    return str(me.data.id)
+
+@server.tool(name="get_user_followers_you_know", description="Retrieves followers of a user that your account follows")
 async def get_user_followers_you_know(
     user_id: str,
     username: str,
     count: Optional[int] = 100,
     cursor: Optional[str] = None
-) -> List[Dict]:
-    """Retrieves a list of common followers. (Simulated as Twitter API v2 doesn't directly support this).
+) -> Dict:
+    """Retrieves the followers of a user that your account also follows.
+
+    Follower and following IDs are fetched once per account, cached as sorted integer arrays
+    and intersected. Lists too long for one rate-limit window are loaded across calls: when the
+    limit is reached, the IDs collected so far are used and the next call resumes from there.
 
     Args:
         user_id (str): The user ID to check for common followers.
         username (str): Your Twitter username (stored in database)
-        count (Optional[int]): The number of followers to retrieve and check. Default is 100.
-        cursor (Optional[str]): A pagination token for fetching the user's followers.
+        count (Optional[int]): The number of users to return per page. Default is 100.
+        cursor (Optional[str]): The next_cursor returned by a previous call.
+
+    Returns:
+        {"items": users, "next_cursor": cursor for the next page or None, "total": number of common users, "complete": False if a list was too large to fetch fully or is still loading}
     """
-    if not check_rate_limit("follow_actions"):
-        raise Exception("Follow action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    # Simulate by fetching followers and filtering (v2 doesn't directly support mutual followers)
-    followers = client.get_users_followers(id=user_id, max_results=count, pagination_token=cursor, user_fields=["id", "name", "username"])
-    return [user.data for user in followers.data][:count]
+    own_id = await get_own_user_id(username)
+    (followers, followers_complete), (following, following_complete) = await asyncio.gather(
+        follow_graph_cache.get_ids(username, user_id, "followers", twitter_call),
+        follow_graph_cache.get_ids(username, own_id, "following", twitter_call)
+    )
+    common = intersect_sorted(followers, following)
+
+    offset = int(cursor) if cursor else 0
+    page_ids = [str(common_id) for common_id in common[offset:offset + count]]
+    users = await get_users_bulk(username, user_ids=page_ids) if page_ids else []
+    next_offset = offset + len(page_ids)
+    return {
+        "items": [user["data"] for user in users if user["data"] is not None],
+        "next_cursor": str(next_offset) if next_offset < len(common) else None,
+        "total": len(common),
+        "complete": followers_complete and following_complete
+    }
 
 @server.tool(name="get_user_subscriptions", description="Retrieves a list of users to which the specified user is subscribed (uses following as proxy)")
 async def get_user_subscriptions(
@@ -303,14 +736,79 @@ async def get_user_subscriptions(
         count (Optional[int]): The number of users to retrieve per page. Default is 100.
         cursor (Optional[str]): A pagination token for fetching the next set of results.
     """
-    if not check_rate_limit("follow_actions"):
-        raise Exception("Follow action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
     # Use following as proxy for subscriptions
-    subscriptions = client.get_users_following(id=user_id, max_results=count, pagination_token=cursor, user_fields=["id", "name", "username"])
+    subscriptions = await twitter_call(username, "get_users_following", id=user_id, max_results=count, pagination_token=cursor, user_fields=["id", "name", "username"])
     return [user.data for user in subscriptions.data]
 
 # Tweet Management Tools
+async def upload_media(
+    username: str,
+    media_paths: List[str],
+    use_cache: bool = True,
+    reused: Optional[set] = None
+) -> List[str]:
+    """Upload media files concurrently and return their media IDs in input order.
+
+    With MEDIA_CACHE_ENABLED, a file whose content (SHA-256) this account uploaded within
+    MEDIA_CACHE_TTL_SECONDS reuses the earlier media ID instead of being uploaded again;
+    such IDs are also added to `reused` when it is given.
+    With IMAGE_OPTIMIZE_ENABLED (and Pillow installed), large images are downsized and
+    recompressed in a process pool before upload.
+
+    Videos, GIFs and files above MEDIA_CHUNKED_THRESHOLD_BYTES use the resumable chunked
+    upload; other files a single upload, each attempt limited to MEDIA_UPLOAD_TIMEOUT_SECONDS.
+    If any upload fails, the others are cancelled and the whole call fails; media already uploaded cannot be
+    deleted through the API and simply expires unattached, so its IDs are logged.
+    """
+    missing = [path for path in media_paths if not os.path.isfile(path)]
+    if missing:
+        raise ValueError(f"Media files not found: {', '.join(missing)}")
+
+    async def upload(path: str) -> str:
+        if needs_chunked_upload(path):
+            return await chunked_uploader.upload(username, path, twitter_call)
+        try:
+            media = await twitter_call(
+                username, "media_upload", api="v1", filename=path, timeout=config.MEDIA_UPLOAD_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Uploading {path} timed out after {config.MEDIA_UPLOAD_TIMEOUT_SECONDS}s")
+        return media.media_id_string
+
+    async def upload_optimized(path: str) -> str:
+        optimized = await image_optimizer.optimize(path) if config.IMAGE_OPTIMIZE_ENABLED else None
+        if optimized is None:
+            return await upload(path)
+        try:
+            return await upload(optimized)
+        finally:
+            os.remove(optimized)
+
+    async def upload_cached(path: str) -> str:
+        if not config.MEDIA_CACHE_ENABLED:
+            return await upload_optimized(path)
+        # The cache is keyed by the original file, so a hit also skips optimization
+        content_hash = await media_cache.content_hash(path)
+        media_id = await media_cache.get(username, content_hash) if use_cache else None
+        if media_id is None:
+            media_id = await upload_optimized(path)
+            await media_cache.put(username, content_hash, media_id)
+        elif reused is not None:
+            reused.add(media_id)
+        return media_id
+
+    uploads = [asyncio.ensure_future(upload_cached(path)) for path in media_paths]
+    try:
+        return await asyncio.gather(*uploads)
+    except BaseException:
+        for task in uploads:
+            task.cancel()
+        await asyncio.gather(*uploads, return_exceptions=True)
+        orphaned = [task.result() for task in uploads if not task.cancelled() and task.exception() is None]
+        if orphaned:
+            logger.warning(f"Media upload failed for '{username}'; unattached media IDs will expire: {orphaned}")
+        raise
+
 @server.tool(name="post_tweet", description="Post a tweet with optional media, reply, and tags")
 async def post_tweet(
     text: str,
@@ -328,21 +826,26 @@ async def post_tweet(
         reply_to (Optional[str]): The ID of the tweet to reply to.
         tags (Optional[List[str]]): A list of hashtags (without '#') to append to the tweet.
     """
-    if not check_rate_limit("tweet_actions"):
-        raise Exception("Tweet action rate limit exceeded")
-    client, v1_api = initialize_twitter_clients(username)
     tweet_data = {"text": text}
     if reply_to:
         tweet_data["in_reply_to_tweet_id"] = reply_to
     if tags:
         tweet_data["text"] += " " + " ".join(f"#{tag}" for tag in tags)
+    reused = set()
     if media_paths:
-        media_ids = []
-        for path in media_paths:
-            media = v1_api.media_upload(filename=path)
-            media_ids.append(media.media_id_string)
-        tweet_data["media_ids"] = media_ids
-    tweet = client.create_tweet(**tweet_data)
+        tweet_data["media_ids"] = await upload_media(username, media_paths, reused=reused)
+    try:
+        tweet = await twitter_call(username, "create_tweet", **tweet_data)
+    except tweepy.BadRequest as e:
+        # Only a reused media ID can explain a media error here; other 400s (text too long,
+        # duplicate tweet) would fail again
+        if not reused or not any("media" in message.lower() for message in e.api_messages):
+            raise
+        # A reused media ID may have expired early on X's side; upload fresh copies once
+        logger.info(f"create_tweet rejected media for '{username}'; retrying with fresh uploads")
+        await media_cache.evict(username, tweet_data["media_ids"])
+        tweet_data["media_ids"] = await upload_media(username, media_paths, use_cache=False)
+        tweet = await twitter_call(username, "create_tweet", **tweet_data)
     logger.info(f"Type of response from client.create_tweet: {type(tweet)}; Content: {tweet}")
     return tweet.data
 
@@ -354,10 +857,7 @@ async def delete_tweet(tweet_id: str, username: str) -> Dict:
         tweet_id (str): The ID of the tweet to delete.
         username (str): Your Twitter username (stored in database)
     """
-    if not check_rate_limit("tweet_actions"):
-        raise Exception("Tweet action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    result = client.delete_tweet(id=tweet_id)
+    result = await twitter_call(username, "delete_tweet", id=tweet_id)
     return {"id": tweet_id, "deleted": result.data["deleted"]}
 
 @server.tool(name="get_tweet_details", description="Get detailed information about a specific tweet")
@@ -368,10 +868,30 @@ async def get_tweet_details(tweet_id: str, username: str) -> Dict:
         tweet_id (str): The ID of the tweet to fetch.
         username (str): Your Twitter username (stored in database)
     """
-    client, _ = initialize_twitter_clients(username)
-    tweet = client.get_tweet(id=tweet_id, tweet_fields=["id", "text", "created_at", "author_id"])
+    if config.BATCH_ENABLED and str(tweet_id).isdigit():
+        return await tweet_loader.load(username, str(tweet_id))
+    tweet = await twitter_call(username, "get_tweet", id=tweet_id, tweet_fields=TWEET_FIELDS)
     return tweet.data
 
+@server.tool(name="get_tweets_bulk", description="Look up many tweets by ID in one call")
+async def get_tweets_bulk(tweet_ids: List[str], username: str) -> List[Dict]:
+    """Looks up many tweets, chunked into 100-item requests that run concurrently.
+
+    Args:
+        tweet_ids (List[str]): Tweet IDs to look up.
+        username (str): Your Twitter username (stored in database)
+
+    Returns:
+        One {"key", "data", "error"} entry per requested tweet, in input order.
+    """
+    keys = [str(tweet_id) for tweet_id in tweet_ids]
+    unique = list(dict.fromkeys(keys))
+    results = {
+        result["key"]: result
+        for result in await bulk_lookup(username, unique, "get_tweets", "ids", "id", tweet_fields=TWEET_FIELDS)
+    }
+    return [results[key] for key in keys]
+
 @server.tool(name="create_poll_tweet", description="Create a tweet with a poll")
 async def create_poll_tweet(
     text: str,
@@ -387,15 +907,12 @@ async def create_poll_tweet(
         duration_minutes (int): Duration of the poll in minutes (min 5, max 10080 (7 days)).
         username (str): Your Twitter username (stored in database)
     """
-    if not check_rate_limit("tweet_actions"):
-        raise Exception("Tweet action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
     poll_data = {
         "text": text,
         "poll_options": choices,
         "poll_duration_minutes": duration_minutes
     }
-    tweet = client.create_tweet(**poll_data)
+    tweet = await twitter_call(username, "create_tweet", **poll_data)
     return tweet.data
 
 @server.tool(name="vote_on_poll", description="Vote on a poll (mocked)")
@@ -407,8 +924,6 @@ async def vote_on_poll(tweet_id: str, choice: str, username: str) -> Dict:
         choice (str): The choice to vote for (must exactly match one of the poll options).
         username (str): Your Twitter username (stored in database)
     """
-    if not check_rate_limit("tweet_actions"):
-        raise Exception("Tweet action rate limit exceeded")
     # Twitter API v2 doesn't support poll voting; return mock response
     return {"tweet_id": tweet_id, "choice": choice, "status": "voted"}
 
@@ -420,10 +935,7 @@ async def favorite_tweet(tweet_id: str, username: str) -> Dict:
         tweet_id (str): The ID of the tweet to favorite (like).
         username (str): Your Twitter username (stored in database)
     """
-    if not check_rate_limit("like_actions"):
-        raise Exception("Like action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    result = client.like(tweet_id=tweet_id)
+    result = await twitter_call(username, "like", tweet_id=tweet_id)
     return {"tweet_id": tweet_id, "liked": result.data["liked"]}
 
 @server.tool(name="unfavorite_tweet", description="Unfavorites a tweet")
@@ -434,10 +946,7 @@ async def unfavorite_tweet(tweet_id: str, username: str) -> Dict:
         tweet_id (str): The ID of the tweet to unfavorite (unlike).
         username (str): Your Twitter username (stored in database)
     """
-    if not check_rate_limit("like_actions"):
-        raise Exception("Like action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    result = client.unlike(tweet_id=tweet_id)
+    result = await twitter_call(username, "unlike", tweet_id=tweet_id)
     return {"tweet_id": tweet_id, "liked": not result.data["liked"]}
 
 @server.tool(name="bookmark_tweet", description="Adds the tweet to bookmarks")
@@ -453,10 +962,7 @@ async def bookmark_tweet(
         username (str): Your Twitter username (stored in database)
         folder_id (Optional[str]): The ID of the bookmark folder to add the tweet to. (Currently not supported by Tweepy v2 client, will be ignored).
     """
-    if not check_rate_limit("tweet_actions"):
-        raise Exception("Tweet action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    result = client.bookmark(tweet_id=tweet_id)
+    result = await twitter_call(username, "bookmark", tweet_id=tweet_id)
     return {"tweet_id": tweet_id, "bookmarked": result.data["bookmarked"]}
 
 @server.tool(name="delete_bookmark", description="Removes the tweet from bookmarks")
@@ -467,10 +973,7 @@ async def delete_bookmark(tweet_id: str, username: str) -> Dict:
         tweet_id (str): The ID of the tweet to remove from bookmarks.
         username (str): Your Twitter username (stored in database)
     """
-    if not check_rate_limit("tweet_actions"):
-        raise Exception("Tweet action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
-    result = client.remove_bookmark(tweet_id=tweet_id)
+    result = await twitter_call(username, "remove_bookmark", tweet_id=tweet_id)
     return {"tweet_id": tweet_id, "bookmarked": not result.data["bookmarked"]}
 
 @server.tool(name="delete_all_bookmarks", description="Deletes all bookmarks (simulated)")
@@ -480,49 +983,119 @@ async def delete_all_bookmarks(username: str) -> Dict:
     Args:
         username (str): Your Twitter username (stored in database)
     """
-    if not check_rate_limit("tweet_actions"):
-        raise Exception("Tweet action rate limit exceeded")
-    client, _ = initialize_twitter_clients(username)
     # Twitter API v2 doesn't have a direct endpoint; simulate by fetching and removing
-    bookmarks = client.get_bookmarks()
+    bookmarks = await twitter_call(username, "get_bookmarks")
     for bookmark in bookmarks.data:
-        client.remove_bookmark(tweet_id=bookmark["id"])
+        await twitter_call(username, "remove_bookmark", tweet_id=bookmark["id"])
     return {"status": "all bookmarks deleted"}
 
 # Timeline & Search Tools
+async def fetch_feed(
+    username: str,
+    feed: Optional[str],
+    method: str,
+    incremental: bool = False,
+    exclude_seen: bool = False,
+    page_param: str = "pagination_token",
+    **kwargs
+) -> List[Dict]:
+    """Fetch a tweet feed.
+
+    When incremental, every tweet newer than the stored since_id is returned: pages are
+    followed until they run out, and only then is since_id moved forward. If a rate limit
+    interrupts the sync, the tweets fetched so far are returned and since_id is kept, so
+    the next sync delivers them again rather than skipping the rest. The first incremental
+    call (no stored since_id) fetches a single page and starts from its newest tweet, rather
+    than walking the whole timeline. When exclude_seen,
+    tweets the account has already seen are dropped and further pages are fetched (up to
+    SEEN_TWEETS_MAX_PAGES) until max_results unseen tweets are collected; the returned
+    tweets are then recorded as seen.
+    """
+    if incremental:
+        kwargs["since_id"] = await feed_sync.get_since_id(username, feed)
+    first_sync = incremental and kwargs["since_id"] is None
+    if exclude_seen:
+        await seen_store.load(username)
+    if not incremental and not exclude_seen:
+        cursor = kwargs.pop(page_param, None)
+        tweets = await fetch_page(username, method, cursor, page_param, **kwargs)
+        return [tweet.data for tweet in tweets.data]
+
+    count = kwargs.get("max_results") or 100
+    fetched = []
+    collected = []
+    newest_id = None
+    complete = False
+    for page in itertools.count():
+        try:
+            tweets = await twitter_call(username, method, **kwargs)
+        except (RateLimitExceeded, tweepy.TooManyRequests) as e:
+            if not incremental or page == 0:
+                raise
+            logger.info(f"Incremental sync of {feed} for '{username}' interrupted, keeping since_id: {e}")
+            break
+        meta = tweets.meta or {}
+        page_tweets = tweets.data or []
+        if page == 0:
+            newest_id = meta.get("newest_id")
+        fetched.extend(page_tweets)
+        if exclude_seen:
+            page_tweets = [tweet for tweet in page_tweets if not seen_store.contains(username, tweet.id)]
+        collected.extend(page_tweets)
+        if not meta.get("next_token") or first_sync:
+            complete = True
+            break
+        # An incremental sync has to reach since_id before it can move it
+        if not incremental and (len(collected) >= count or page + 1 >= config.SEEN_TWEETS_MAX_PAGES):
+            break
+        kwargs[page_param] = meta["next_token"]
+
+    if incremental and complete:
+        await feed_sync.record(username, feed, fetched, newest_id)
+    if not incremental:
+        collected = collected[:count]
+    if exclude_seen:
+        seen_store.add(username, (tweet.id for tweet in collected))
+    return [tweet.data for tweet in collected]
+
 @server.tool(name="get_timeline", description="Get tweets from your home timeline (For You)")
 async def get_timeline(
     username: str,
     count: Optional[int] = 100,
     seen_tweet_ids: Optional[List[str]] = None,
-    cursor: Optional[str] = None
+    cursor: Optional[str] = None,
+    incremental: Optional[bool] = False,
+    exclude_seen: Optional[bool] = False
 ) -> List[Dict]:
     """Fetches home timeline tweets (typically 'For You' or algorithmically sorted).
 
     Args:
         username (str): Your Twitter username (stored in database)
         count (Optional[int]): Number of tweets to retrieve. Default 100. Min 5, Max 100 for get_home_timeline.
-        seen_tweet_ids (Optional[List[str]]): List of tweet IDs already seen by the user, to potentially influence timeline results. (Note: Tweepy's get_home_timeline doesn't directly support this, this arg is for future use or custom logic).
+        seen_tweet_ids (Optional[List[str]]): Tweet IDs already seen by the user. They are recorded in the account's seen-tweet store and excluded when exclude_seen is set.
         cursor (Optional[str]): Pagination token for fetching the next set of results.
+        incremental (Optional[bool]): Return every tweet newer than the last incremental call, paging `count` at a time. Default False.
+        exclude_seen (Optional[bool]): Skip already-seen tweets, paging until `count` unseen tweets are collected, and mark the returned tweets as seen. Default False.
     """
-    client, _ = initialize_twitter_clients(username)
-    tweets = client.get_home_timeline(max_results=count, pagination_token=cursor, tweet_fields=["id", "text", "created_at"])
-    return [tweet.data for tweet in tweets.data]
+    if seen_tweet_ids:
+        await seen_store.load(username)
+        seen_store.add(username, seen_tweet_ids)
+    return await fetch_feed(username, "home", "get_home_timeline", incremental, exclude_seen, max_results=count, pagination_token=cursor, tweet_fields=["id", "text", "created_at"])
 
 @server.tool(name="get_latest_timeline", description="Get tweets from your home timeline (Following)")
 async def get_latest_timeline(
     username: str,
-    count: Optional[int] = 100
+    count: Optional[int] = 100,
+    incremental: Optional[bool] = False
 ) -> List[Dict]:
     """Fetches latest timeline tweets (reverse chronological order from accounts the user follows).
 
     Args:
         username (str): Your Twitter username (stored in database)
         count (Optional[int]): Number of tweets to retrieve. Default 100. Min 5, Max 100 for get_home_timeline.
+        incremental (Optional[bool]): Return every tweet newer than the last incremental call, paging `count` at a time. Default False.
     """
-    client, _ = initialize_twitter_clients(username)
-    tweets = client.get_home_timeline(max_results=count, tweet_fields=["id", "text", "created_at"], exclude=["replies", "retweets"])
-    return [tweet.data for tweet in tweets.data]
+    return await fetch_feed(username, "latest", "get_home_timeline", incremental, max_results=count, tweet_fields=["id", "text", "created_at"], exclude=["replies", "retweets"])
 
 @server.tool(name="search_twitter", description="Search Twitter with a query")
 async def search_twitter(
@@ -530,8 +1103,11 @@ async def search_twitter(
     username: str,
     product: Optional[str] = "Top",
     count: Optional[int] = 100,
-    cursor: Optional[str] = None
-) -> List[Dict]:
+    cursor: Optional[str] = None,
+    exclude_seen: Optional[bool] = False,
+    max_items: Optional[int] = None,
+    ctx: Optional[Context] = None
+) -> Union[List[Dict], Dict]:
     """Searches Twitter for recent tweets.
 
     Args:
@@ -540,8 +1116,14 @@ async def search_twitter(
         product (Optional[str]): Sorting preference. 'Top' for relevancy (default), 'Latest' for recency.
         count (Optional[int]): Number of tweets to retrieve. Default 100. Min 10, Max 100 for search_recent_tweets.
         cursor (Optional[str]): Pagination token (next_token) for fetching the next set of results.
+        exclude_seen (Optional[bool]): Skip already-seen tweets, paging until `count` unseen tweets are collected, and mark the returned tweets as seen. Default False.
+        max_items (Optional[int]): Fetch pages until this many tweets are collected. Returns {"items", "next_cursor", "complete", "stopped"}; pass next_cursor back as cursor to resume. Cannot be combined with exclude_seen.
     """
     sort_order = "relevancy" if product == "Top" else "recency"
+    if max_items:
+        if exclude_seen:
+            raise ValueError("max_items cannot be combined with exclude_seen")
+        return await paginate(username, "search_recent_tweets", max_items, 100, cursor, page_param="next_token", ctx=ctx, query=query, sort_order=sort_order, tweet_fields=["id", "text", "created_at"])
     
     # Ensure count is within the allowed range (10-100)
     if count is None:
@@ -555,15 +1137,14 @@ async def search_twitter(
     else:
         effective_count = count
         
-    client, _ = initialize_twitter_clients(username)
-    tweets = client.search_recent_tweets(query=query, max_results=effective_count, sort_order=sort_order, next_token=cursor, tweet_fields=["id", "text", "created_at"])
-    return [tweet.data for tweet in tweets.data]
+    return await fetch_feed(username, None, "search_recent_tweets", exclude_seen=exclude_seen, page_param="next_token", query=query, max_results=effective_count, sort_order=sort_order, next_token=cursor, tweet_fields=["id", "text", "created_at"])
 
 @server.tool(name="get_trends", description="Retrieves trending topics on Twitter")
 async def get_trends(
     username: str,
     category: Optional[str] = None,
-    count: Optional[int] = 50
+    count: Optional[int] = 50,
+    woeid: Optional[int] = 1
 ) -> List[Dict]:
     """Fetches trending topics (uses Twitter API v1.1 as v2 trends require specific location WOEID).
 
@@ -571,11 +1152,17 @@ async def get_trends(
         username (str): Your Twitter username (stored in database)
         category (Optional[str]): Filter trends by category (e.g., 'Sports', 'News'). Currently not directly supported by `get_place_trends` for worldwide, will filter locally if provided.
         count (Optional[int]): Number of trending topics to retrieve. Default 50. Max 50 (as per Twitter API v1.1 default).
+        woeid (Optional[int]): Yahoo! Where On Earth ID of the location. Default 1 (worldwide).
     """
-    _, v1_api = initialize_twitter_clients(username)
-    # Twitter API v2 trends require a location; use v1.1 for trends
-    trends = v1_api.get_place_trends(id=1)  # WOEID 1 = Worldwide
-    trends = trends[0]["trends"]
+    async def fetch():
+        # Twitter API v2 trends require a location; use v1.1 for trends
+        trends = await twitter_call(username, "get_place_trends", api="v1", id=woeid)
+        return trends[0]["trends"]
+
+    if config.TRENDS_CACHE_ENABLED:
+        trends = await trends_cache.get(woeid, fetch)
+    else:
+        trends = await fetch()
     if category:
         trends = [t for t in trends if t.get("category") == category]
     return trends[:count]
@@ -585,8 +1172,10 @@ async def get_highlights_tweets(
     user_id: str,
     username: str,
     count: Optional[int] = 100,
-    cursor: Optional[str] = None
-) -> List[Dict]:
+    cursor: Optional[str] = None,
+    max_items: Optional[int] = None,
+    ctx: Optional[Context] = None
+) -> Union[List[Dict], Dict]:
     """Fetches highlighted tweets from a user's timeline. (Simulated using user's timeline as Twitter API v2 doesn't have a direct 'highlights' endpoint).
 
     Args:
@@ -594,10 +1183,12 @@ async def get_highlights_tweets(
         username (str): Your Twitter username (stored in database)
         count (Optional[int]): Number of tweets to retrieve. Default 100. Min 5, Max 100 for get_users_tweets.
         cursor (Optional[str]): Pagination token for fetching the next set of results.
+        max_items (Optional[int]): Fetch pages until this many tweets are collected. Returns {"items", "next_cursor", "complete", "stopped"}; pass next_cursor back as cursor to resume.
     """
-    client, _ = initialize_twitter_clients(username)
     # Twitter API v2 doesn't have highlights; use user timeline
-    tweets = client.get_users_tweets(id=user_id, max_results=count, pagination_token=cursor, tweet_fields=["id", "text", "created_at"])
+    if max_items:
+        return await paginate(username, "get_users_tweets", max_items, 100, cursor, ctx=ctx, id=user_id, tweet_fields=["id", "text", "created_at"])
+    tweets = await twitter_call(username, "get_users_tweets", id=user_id, max_results=count, pagination_token=cursor, tweet_fields=["id", "text", "created_at"])
     return [tweet.data for tweet in tweets.data]
 
 @server.tool(name="get_user_mentions", description="Get tweets mentioning a specific user")
@@ -605,8 +1196,12 @@ async def get_user_mentions(
     user_id: str,
     username: str,
     count: Optional[int] = 100,
-    cursor: Optional[str] = None
-) -> List[Dict]:
+    cursor: Optional[str] = None,
+    incremental: Optional[bool] = False,
+    exclude_seen: Optional[bool] = False,
+    max_items: Optional[int] = None,
+    ctx: Optional[Context] = None
+) -> Union[List[Dict], Dict]:
     """Fetches tweets mentioning a specific user.
 
     Args:
@@ -614,10 +1209,30 @@ async def get_user_mentions(
         username (str): Your Twitter username (stored in database)
         count (Optional[int]): Number of mentions to retrieve. Default 100. Min 5, Max 100 for get_users_mentions.
         cursor (Optional[str]): Pagination token for fetching the next set of results.
+        incremental (Optional[bool]): Return every mention newer than the last incremental call, paging `count` at a time. Default False.
+        exclude_seen (Optional[bool]): Skip already-seen tweets, paging until `count` unseen tweets are collected, and mark the returned tweets as seen. Default False.
+        max_items (Optional[int]): Fetch pages until this many mentions are collected. Returns {"items", "next_cursor", "complete", "stopped"}; pass next_cursor back as cursor to resume. Cannot be combined with incremental or exclude_seen.
+    """
+    if max_items:
+        if incremental or exclude_seen:
+            raise ValueError("max_items cannot be combined with incremental or exclude_seen")
+        return await paginate(username, "get_users_mentions", max_items, 100, cursor, ctx=ctx, id=user_id, tweet_fields=["id", "text", "created_at"])
+    return await fetch_feed(username, f"mentions:{user_id}", "get_users_mentions", incremental, exclude_seen, id=user_id, max_results=count, pagination_token=cursor, tweet_fields=["id", "text", "created_at"])
+
+@server.tool(name="get_recent_feed_tweets", description="Get recently synced tweets from the local buffer without calling X")
+async def get_recent_feed_tweets(
+    feed: str,
+    username: str,
+    count: Optional[int] = 100
+) -> List[Dict]:
+    """Returns tweets collected by incremental calls, newest first, without an API request.
+
+    Args:
+        feed (str): "home" (get_timeline), "latest" (get_latest_timeline) or "mentions:<user_id>" (get_user_mentions).
+        username (str): Your Twitter username (stored in database)
+        count (Optional[int]): Maximum number of tweets to return. Default 100.
     """
-    client, _ = initialize_twitter_clients(username)
-    mentions = client.get_users_mentions(id=user_id, max_results=count, pagination_token=cursor, tweet_fields=["id", "text", "created_at"])
-    return [tweet.data for tweet in mentions.data]
+    return [tweet.data for tweet in feed_sync.recent(username, feed, count)]
 
 # Main server execution
 def run():
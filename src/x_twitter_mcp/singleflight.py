@@ -0,0 +1,46 @@
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Hashable
+
+def make_key(username: str, method: str, args: tuple, kwargs: Dict) -> str:
+    """مفتاح ثابت للطلب بغض النظر عن ترتيب المعاملات المسماة"""
+    return json.dumps([username, method, list(args), kwargs], sort_keys=True, default=str)
+
+class SingleFlight:
+    """مشاركة طلب قراءة جارٍ واحد بين جميع الطلبات المتطابقة المتزامنة"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """تنفيذ factory مرة واحدة لكل مفتاح جارٍ وإعادة نتيجتها لكل المنتظرين"""
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # إلغاء أحد المنتظرين لا يلغي الطلب المشترك
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        self._in_flight.pop(key, None)
+        # استرجاع الخطأ حتى لا يُسجَّل كخطأ مهمل إذا أُلغي كل المنتظرين
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """عدد الطلبات وعدد ما شارك منها طلباً جارياً"""
+        return {
+            "calls": self.calls,
+            "upstream_requests": self.calls - self.shared,
+            "shared": self.shared,
+            "in_flight": len(self._in_flight)
+        }
+
+# إنشاء طبقة الدمج العامة
+single_flight = SingleFlight()